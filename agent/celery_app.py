@@ -19,6 +19,10 @@ app.conf.update(
     task_acks_late=True,
     task_reject_on_worker_lost=True,
     worker_prefetch_multiplier=1,
+    # Research runs are async on one background loop per process; task threads
+    # only wait on them, so one process serves AGENT_WORKER_CONCURRENCY jobs
+    worker_pool="threads",
+    worker_concurrency=settings.AGENT_WORKER_CONCURRENCY,
     task_routes={
         "agent.tasks.*": {"queue": "agent"},
     },
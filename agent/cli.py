@@ -11,9 +11,11 @@ from rich.live import Live
 from rich.panel import Panel
 from rich.text import Text
 
-from agent.core import AgentLoop
+from agent.core import TOOL_CONCURRENCY, AgentLoop
+from agent.matching import MATCH_ENGINES
 from agent.prompts import ORCHESTRATOR_PROMPT
 from agent.recorder import SessionRecorder, SessionReplayer
+from agent.tool_cache import tool_cache
 from agent.tools import get_all_tools
 from agent.tracker import TokenTracker
 
@@ -32,7 +34,10 @@ def cli():
 @click.option("--model", default="qwen-plus", help="Model to use (qwen3.5-plus, qwen-max, qwen-plus, qwen-turbo)")
 @click.option("--dry-run", is_flag=True, help="Call LLM but mock all tool executions")
 @click.option("--no-record", is_flag=True, help="Don't record the session")
-def run(message: str, model: str, dry_run: bool, no_record: bool):
+@click.option("--tool-concurrency", default=TOOL_CONCURRENCY, show_default=True,
+              help="Tool calls from one model turn run at once (1 = sequential)")
+@click.option("--no-cache", is_flag=True, help="Re-run every tool instead of reusing cached results")
+def run(message: str, model: str, dry_run: bool, no_record: bool, tool_concurrency: int, no_cache: bool):
     """Run the agent with a user message.
 
     Example: python -m agent.cli run "research nanamica across all channels"
@@ -49,6 +54,8 @@ def run(message: str, model: str, dry_run: bool, no_record: bool):
         tracker=tracker,
         recorder=recorder,
         dry_run=dry_run,
+        tool_concurrency=tool_concurrency,
+        tool_cache=None if no_cache else tool_cache,
     )
 
     mode_label = "[dry-run]" if dry_run else "[live]"
@@ -66,7 +73,12 @@ def run(message: str, model: str, dry_run: bool, no_record: bool):
     if result.tool_calls:
         console.print(f"\n[bold]Tool calls ({len(result.tool_calls)}):[/bold]")
         for tc in result.tool_calls:
-            status = "[dim](dry-run)[/dim]" if dry_run else f"[dim]{tc.duration_ms:.0f}ms[/dim]"
+            if dry_run:
+                status = "[dim](dry-run)[/dim]"
+            elif tc.cached:
+                status = "[dim](cached)[/dim]"
+            else:
+                status = f"[dim]{tc.duration_ms:.0f}ms[/dim]"
             if "error" in (tc.output if isinstance(tc.output, dict) else {}):
                 console.print(f"  [red]x[/red] {tc.name} {status}")
             else:
@@ -170,6 +182,57 @@ def cost(session_file: Path):
     tracker.print_report()
 
 
+@cli.command("bench-match")
+@click.argument("official")
+@click.argument("retailer")
+@click.option("--brand-name", default=None, help="Brand prefix to strip from retailer product names")
+@click.option("--engine", "engines", multiple=True, type=click.Choice(MATCH_ENGINES),
+              help="Engine to benchmark (repeatable; default: all)")
+@click.option("--exhaustive", is_flag=True,
+              help="Measure candidate recall against scoring every pair (slow on large catalogs)")
+def bench_match(official: str, retailer: str, brand_name: str | None, engines: tuple[str, ...], exhaustive: bool):
+    """Compare match engines' runtime and recall on two recorded catalogs.
+
+    OFFICIAL and RETAILER are scrape result handles or catalog files (.json, .ndjson, .ndjson.gz).
+
+    Example: python -m agent.cli bench-match shopify-1f0c9a2b3c4d5e6f crawl-9a8b7c6d5e4f3a2b --brand-name nanamica
+    """
+    from rich.table import Table
+
+    from agent.match_bench import load_catalog, run_benchmark
+
+    official_rows = load_catalog(official)
+    retailer_rows = load_catalog(retailer, brand_name)
+    console.print(f"\n[bold]Matching {len(retailer_rows):,} retailer products "
+                  f"against {len(official_rows):,} official products[/bold]\n")
+
+    results = run_benchmark(official_rows, retailer_rows, engines or MATCH_ENGINES, exhaustive)
+    reference = "every pair scored" if exhaustive else "difflib engine"
+    table = Table(
+        show_header=True,
+        header_style="bold cyan",
+        caption=f"Match recall vs difflib engine; candidate recall vs {reference}",
+    )
+    table.add_column("Engine", style="bold")
+    table.add_column("Match time", justify="right")
+    table.add_column("Matches", justify="right")
+    table.add_column("Match recall", justify="right")
+    table.add_column("Candidates", justify="right")
+    table.add_column("Cand. time", justify="right")
+    table.add_column("Cand. recall", justify="right")
+    for row in results:
+        table.add_row(
+            row["engine"],
+            f"{row['match_seconds']:.2f}s",
+            f"{row['matches']:,}",
+            "-" if row["match_recall"] is None else f"{row['match_recall']:.1%}",
+            f"{row['candidates']:,}",
+            f"{row['candidate_seconds']:.2f}s",
+            f"{row['candidate_recall']:.1%}",
+        )
+    console.print(table)
+
+
 def main():
     cli()
 
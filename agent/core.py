@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Any
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from agent.tracker import TokenTracker
 from agent.recorder import SessionRecorder, SessionReplayer
+from agent.tool_cache import ToolResultCache, canonical_args
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +25,11 @@ MAX_ITERATIONS = 20  # safety limit to prevent infinite loops
 OBSERVATION_WINDOW = 4
 # Max chars for a single tool output before inline truncation
 TOOL_OUTPUT_MAX_CHARS = 4000
+# Tool calls from one model turn executed at once
+TOOL_CONCURRENCY = 4
+# Tools that write: never run alongside other calls of the same turn, so a turn's
+# writes land in the order the model issued them
+SERIAL_TOOL_PREFIXES = ("save_", "sync_")
 
 
 @dataclass
@@ -29,6 +39,7 @@ class ToolCall:
     input: dict
     output: Any
     duration_ms: float
+    cached: bool = False  # served from the tool result cache
 
 
 @dataclass
@@ -65,6 +76,8 @@ class AgentLoop:
         recorder: SessionRecorder | None = None,
         replayer: SessionReplayer | None = None,
         dry_run: bool = False,
+        tool_concurrency: int = TOOL_CONCURRENCY,
+        tool_cache: ToolResultCache | None = None,
     ) -> None:
         from tokyoradar_shared.config import settings
 
@@ -75,6 +88,11 @@ class AgentLoop:
         self.recorder = recorder
         self.replayer = replayer
         self.dry_run = dry_run
+        self.tool_concurrency = max(1, tool_concurrency)
+        self._tool_pool: ThreadPoolExecutor | None = None
+        self.tool_cache = tool_cache
+        self._cache_counts: dict[str, Counter] = {}  # this run's hits/misses per tool
+        self._cache_lock = threading.Lock()
 
         if replayer is None:
             if model.startswith("gemini-"):
@@ -83,10 +101,13 @@ class AgentLoop:
             else:
                 _api_key = api_key or settings.DASHSCOPE_API_KEY
                 _base_url = base_url or settings.DASHSCOPE_BASE_URL
-            self.client = OpenAI(api_key=_api_key, base_url=_base_url)
+            self.client = self._make_client(_api_key, _base_url)
         else:
             self.client = None  # replay mode — no API calls
 
+    def _make_client(self, api_key: str, base_url: str) -> Any:
+        return OpenAI(api_key=api_key, base_url=base_url)
+
     def run(self, user_message: str) -> AgentResult:
         """Main agent loop with tool use."""
         messages: list[dict] = [
@@ -94,34 +115,34 @@ class AgentLoop:
             {"role": "user", "content": user_message},
         ]
         result = AgentResult(tracker=self.tracker)
+        self._cache_counts = {}
 
-        for iteration in range(MAX_ITERATIONS):
-            response = self._call_api(messages)
-            choice = response.choices[0]
-
-            # Append assistant message to history
-            assistant_msg = self._choice_to_dict(choice)
-            messages.append(assistant_msg)
-
-            # If no tool calls, we're done
-            if choice.finish_reason != "tool_calls" or not choice.message.tool_calls:
-                result.final_text = choice.message.content or ""
-                break
-
-            # Execute each tool call
-            for tool_call in choice.message.tool_calls:
-                tc_result = self._execute_tool(tool_call)
-                result.tool_calls.append(tc_result)
-
-                # Append tool result to messages
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps(tc_result.output, default=str),
-                })
-        else:
-            logger.warning("Agent hit max iterations (%d)", MAX_ITERATIONS)
-            result.final_text = "(max iterations reached)"
+        try:
+            for iteration in range(MAX_ITERATIONS):
+                response = self._call_api(messages)
+                choice = response.choices[0]
+
+                # Append assistant message to history
+                assistant_msg = self._choice_to_dict(choice)
+                messages.append(assistant_msg)
+
+                # If no tool calls, we're done
+                if choice.finish_reason != "tool_calls" or not choice.message.tool_calls:
+                    result.final_text = choice.message.content or ""
+                    break
+
+                # Execute the turn's tool calls (concurrently where independent);
+                # results come back in the order the model issued them
+                tc_results = self._execute_tool_calls(choice.message.tool_calls)
+                _append_tool_results(messages, result, choice.message.tool_calls, tc_results)
+            else:
+                logger.warning("Agent hit max iterations (%d)", MAX_ITERATIONS)
+                result.final_text = "(max iterations reached)"
+        finally:
+            if self._tool_pool is not None:
+                self._tool_pool.shutdown(wait=False)
+                self._tool_pool = None
+        self._record_cache_counts()
 
         result.messages = messages
         return result
@@ -136,6 +157,15 @@ class AgentLoop:
         if self.replayer:
             return self._replay_api_call()
 
+        kwargs = self._api_request(messages)
+        t0 = time.monotonic()
+        response = self.client.chat.completions.create(**kwargs)
+        latency_ms = (time.monotonic() - t0) * 1000
+        self._track_response(response, kwargs["messages"], latency_ms)
+        return response
+
+    def _api_request(self, messages: list[dict]) -> dict[str, Any]:
+        """Build chat.completions kwargs: tool schemas and masked history."""
         # Build tool schemas for the API
         tool_schemas = [
             {
@@ -158,11 +188,9 @@ class AgentLoop:
         }
         if tool_schemas:
             kwargs["tools"] = tool_schemas
+        return kwargs
 
-        t0 = time.monotonic()
-        response = self.client.chat.completions.create(**kwargs)
-        latency_ms = (time.monotonic() - t0) * 1000
-
+    def _track_response(self, response: Any, masked_messages: list[dict], latency_ms: float) -> None:
         # Track usage
         self.tracker.record(response, latency_ms, self.model)
 
@@ -179,8 +207,6 @@ class AgentLoop:
                 model=self.model,
             )
 
-        return response
-
     def _replay_api_call(self) -> Any:
         """Return a mock response from the replayer."""
         resp_dict = self.replayer.next_api_response()
@@ -225,8 +251,151 @@ class AgentLoop:
 
         return None
 
+    def _execute_tool_calls(self, tool_calls: list) -> list[ToolCall]:
+        """Execute one turn's tool calls and return their results in call order.
+
+        Consecutive read-only calls run concurrently, up to tool_concurrency at
+        a time; save_* calls run alone, in order. Replay and dry-run stay
+        sequential (the replayer hands out recorded results in order). Recorder
+        entries are written in call order once a batch finishes, so a session
+        file doesn't depend on which call happened to finish first.
+        """
+        if self.replayer or self.dry_run or self.tool_concurrency == 1 or len(tool_calls) == 1:
+            return [self._execute_tool(tool_call) for tool_call in tool_calls]
+
+        if self._tool_pool is None:
+            self._tool_pool = ThreadPoolExecutor(
+                self.tool_concurrency, thread_name_prefix="agent-tool",
+            )
+
+        results: list[ToolCall] = []
+        for batch in _independent_batches(tool_calls):
+            unique, positions = self._dedupe_batch(batch)
+            if len(unique) == 1:
+                outcomes = [self._run_tool(unique[0])]
+            else:
+                outcomes = list(self._tool_pool.map(self._run_tool, unique))
+            results.extend(self._finish_batch(outcomes, positions))
+        return results
+
+    def _dedupe_batch(self, batch: list) -> tuple[list, list[tuple[int, bool]]]:
+        """Collapse identical cacheable calls within a concurrent batch.
+
+        Returns the calls to run and, per original call, (index into them,
+        whether it repeats an earlier call). Repeats share the first call's
+        result, as the cache would have served them had they run in sequence.
+        """
+        unique: list = []
+        positions: list[tuple[int, bool]] = []
+        first_index: dict[tuple[str, str], int] = {}
+        for tool_call in batch:
+            key = None
+            if self.tool_cache is not None and self.tool_cache.cacheable(tool_call.function.name):
+                key = (tool_call.function.name, _canonical_arguments(tool_call.function.arguments))
+            if key is not None and key in first_index:
+                positions.append((first_index[key], True))
+                continue
+            if key is not None:
+                first_index[key] = len(unique)
+            positions.append((len(unique), False))
+            unique.append(tool_call)
+        return unique, positions
+
+    def _finish_batch(
+        self, outcomes: list[tuple[ToolCall, bool]], positions: list[tuple[int, bool]],
+    ) -> list[ToolCall]:
+        """Record a batch's results in call order and return them."""
+        results: list[ToolCall] = []
+        for index, repeated in positions:
+            tc_result, executed = outcomes[index]
+            if repeated:
+                tc_result = ToolCall(
+                    name=tc_result.name, input=tc_result.input, output=tc_result.output,
+                    duration_ms=0, cached=True,
+                )
+                with self._cache_lock:
+                    self._cache_counts.setdefault(tc_result.name, Counter())["hits"] += 1
+            if executed:
+                self._record_tool(tc_result)
+            results.append(tc_result)
+        return results
+
     def _execute_tool(self, tool_call) -> ToolCall:
         """Execute a single tool call, or return mock/cached in dry-run/replay mode."""
+        tc_result, executed = self._run_tool(tool_call)
+        if executed:
+            self._record_tool(tc_result)
+        return tc_result
+
+    def _record_tool(self, tc_result: ToolCall) -> None:
+        if self.recorder:
+            cache = None
+            if self.tool_cache is not None and self.tool_cache.cacheable(tc_result.name):
+                cache = "hit" if tc_result.cached else "miss"
+            self.recorder.record_tool_execution(
+                tool_name=tc_result.name,
+                tool_input=tc_result.input,
+                tool_output=tc_result.output,
+                duration_ms=tc_result.duration_ms,
+                cache=cache,
+            )
+
+    def _cached_result(self, name: str, args: dict) -> ToolCall | None:
+        """A cache hit for this call as a ToolCall, or None (and count the lookup)."""
+        if self.tool_cache is None or not self.tool_cache.cacheable(name):
+            return None
+        output = self.tool_cache.get(name, args)
+        with self._cache_lock:
+            self._cache_counts.setdefault(name, Counter())["hits" if output is not None else "misses"] += 1
+        if output is None:
+            return None
+        return ToolCall(name=name, input=args, output=output, duration_ms=0, cached=True)
+
+    def _remember_result(self, name: str, args: dict, output: Any) -> None:
+        """Cache an executed call's output and run write invalidation."""
+        if self.tool_cache is None:
+            return
+        self.tool_cache.put(name, args, output)
+        stale = self.tool_cache.after_call(name, output)
+        if stale:
+            logger.debug("%s invalidated cached %s", name, ", ".join(stale))
+
+    def _record_cache_counts(self) -> None:
+        if self.recorder and self._cache_counts:
+            self.recorder.record_tool_cache(
+                {name: dict(counts) for name, counts in self._cache_counts.items()}
+            )
+
+    def _run_tool(self, tool_call) -> tuple[ToolCall, bool]:
+        """Run one tool call without recording it.
+
+        Returns the ToolCall and whether the tool actually executed (only
+        executions are recorded; mocks, replays and rejections are not).
+        """
+        name, args, tool_def, skipped = self._prepare_tool(tool_call)
+        if skipped is not None:
+            return skipped, False
+        cached = self._cached_result(name, args)
+        if cached is not None:
+            return cached, True
+
+        t0 = time.monotonic()
+        try:
+            output = tool_def.handler(**args)
+        except Exception as exc:
+            logger.exception("Tool %s failed", name)
+            output = {"error": str(exc)}
+        duration_ms = (time.monotonic() - t0) * 1000
+        self._remember_result(name, args, output)
+
+        return ToolCall(name=name, input=args, output=output, duration_ms=duration_ms), True
+
+    def _prepare_tool(self, tool_call) -> tuple[str, dict, Any, ToolCall | None]:
+        """Parse a tool call and find its ToolDef.
+
+        The last element is the finished ToolCall when the tool must not run
+        (replay, dry-run, rejected input, unknown tool), else None.
+        """
         name = tool_call.function.name
         try:
             args = json.loads(tool_call.function.arguments)
@@ -237,42 +406,26 @@ class AgentLoop:
             output = self.replayer.next_tool_result()
             if output is None:
                 output = {"error": "replayer exhausted"}
-            return ToolCall(name=name, input=args, output=output, duration_ms=0)
+            return name, args, None, ToolCall(name=name, input=args, output=output, duration_ms=0)
 
         if self.dry_run:
             output = {"dry_run": True, "tool": name, "args": args,
                        "message": f"Dry-run: {name} was not executed"}
-            return ToolCall(name=name, input=args, output=output, duration_ms=0)
+            return name, args, None, ToolCall(name=name, input=args, output=output, duration_ms=0)
 
         # Validate inputs before execution (catch fabricated data)
         validation_error = self._validate_tool_input(name, args)
         if validation_error:
             logger.warning("Validation rejected %s: %s", name, validation_error)
-            return ToolCall(name=name, input=args, output=validation_error, duration_ms=0)
+            return name, args, None, ToolCall(name=name, input=args, output=validation_error, duration_ms=0)
 
         # Live execution
         tool_def = self.tools.get(name)
         if tool_def is None:
             output = {"error": f"Unknown tool: {name}"}
-            return ToolCall(name=name, input=args, output=output, duration_ms=0)
-
-        t0 = time.monotonic()
-        try:
-            output = tool_def.handler(**args)
-        except Exception as exc:
-            logger.exception("Tool %s failed", name)
-            output = {"error": str(exc)}
-        duration_ms = (time.monotonic() - t0) * 1000
-
-        if self.recorder:
-            self.recorder.record_tool_execution(
-                tool_name=name,
-                tool_input=args,
-                tool_output=output,
-                duration_ms=duration_ms,
-            )
+            return name, args, None, ToolCall(name=name, input=args, output=output, duration_ms=0)
 
-        return ToolCall(name=name, input=args, output=output, duration_ms=duration_ms)
+        return name, args, tool_def, None
 
     @staticmethod
     def _choice_to_dict(choice) -> dict:
@@ -303,6 +456,143 @@ class AgentLoop:
         return msg
 
 
+class AsyncAgentLoop(AgentLoop):
+    """AgentLoop on asyncio: awaits the LLM (AsyncOpenAI) and the tools instead
+    of blocking a thread, so one process can drive many runs concurrently.
+
+    Tools with an async_handler (MCP tools) are awaited directly; others run
+    in a worker thread. Batching, recording and replay behave exactly as in
+    AgentLoop, so sessions from either loop replay with the other.
+    """
+
+    def _make_client(self, api_key: str, base_url: str) -> Any:
+        return AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+    async def run(self, user_message: str) -> AgentResult:
+        """Main agent loop with tool use."""
+        messages: list[dict] = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_message},
+        ]
+        result = AgentResult(tracker=self.tracker)
+        self._cache_counts = {}
+
+        try:
+            for iteration in range(MAX_ITERATIONS):
+                response = await self._call_api(messages)
+                choice = response.choices[0]
+
+                messages.append(self._choice_to_dict(choice))
+
+                if choice.finish_reason != "tool_calls" or not choice.message.tool_calls:
+                    result.final_text = choice.message.content or ""
+                    break
+
+                tc_results = await self._execute_tool_calls(choice.message.tool_calls)
+                _append_tool_results(messages, result, choice.message.tool_calls, tc_results)
+            else:
+                logger.warning("Agent hit max iterations (%d)", MAX_ITERATIONS)
+                result.final_text = "(max iterations reached)"
+        finally:
+            if self.client is not None:
+                await self.client.close()
+        self._record_cache_counts()
+
+        result.messages = messages
+        return result
+
+    async def _call_api(self, messages: list[dict]) -> Any:
+        if self.replayer:
+            return self._replay_api_call()
+
+        kwargs = self._api_request(messages)
+        t0 = time.monotonic()
+        response = await self.client.chat.completions.create(**kwargs)
+        latency_ms = (time.monotonic() - t0) * 1000
+        self._track_response(response, kwargs["messages"], latency_ms)
+        return response
+
+    async def _execute_tool_calls(self, tool_calls: list) -> list[ToolCall]:
+        if self.replayer or self.dry_run or self.tool_concurrency == 1 or len(tool_calls) == 1:
+            outcomes = [await self._run_tool(tool_call) for tool_call in tool_calls]
+            for tc_result, executed in outcomes:
+                if executed:
+                    self._record_tool(tc_result)
+            return [tc_result for tc_result, _ in outcomes]
+
+        limit = asyncio.Semaphore(self.tool_concurrency)
+
+        async def bounded(tool_call) -> tuple[ToolCall, bool]:
+            async with limit:
+                return await self._run_tool(tool_call)
+
+        results: list[ToolCall] = []
+        for batch in _independent_batches(tool_calls):
+            unique, positions = self._dedupe_batch(batch)
+            outcomes = await asyncio.gather(*map(bounded, unique))
+            results.extend(self._finish_batch(outcomes, positions))
+        return results
+
+    async def _run_tool(self, tool_call) -> tuple[ToolCall, bool]:
+        name, args, tool_def, skipped = self._prepare_tool(tool_call)
+        if skipped is not None:
+            return skipped, False
+        if self.tool_cache is not None:
+            # Cache I/O is a Redis round-trip; keep it off the event loop
+            cached = await asyncio.to_thread(self._cached_result, name, args)
+            if cached is not None:
+                return cached, True
+
+        t0 = time.monotonic()
+        try:
+            if tool_def.async_handler is not None:
+                output = await tool_def.async_handler(**args)
+            else:
+                output = await asyncio.to_thread(tool_def.handler, **args)
+        except Exception as exc:
+            logger.exception("Tool %s failed", name)
+            output = {"error": str(exc)}
+        duration_ms = (time.monotonic() - t0) * 1000
+        if self.tool_cache is not None:
+            await asyncio.to_thread(self._remember_result, name, args, output)
+
+        return ToolCall(name=name, input=args, output=output, duration_ms=duration_ms), True
+
+
+def _append_tool_results(
+    messages: list[dict], result: AgentResult, tool_calls: list, tc_results: list[ToolCall],
+) -> None:
+    """Add a turn's tool results to the run result and to the message history."""
+    for tool_call, tc_result in zip(tool_calls, tc_results):
+        result.tool_calls.append(tc_result)
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": json.dumps(tc_result.output, default=str),
+        })
+
+
+def _canonical_arguments(arguments: str) -> str:
+    try:
+        return canonical_args(json.loads(arguments))
+    except (json.JSONDecodeError, TypeError):
+        return arguments
+
+
+def _independent_batches(tool_calls: list) -> list[list]:
+    """Split a turn's tool calls into batches that may run concurrently:
+    runs of read-only calls, with each write call in a batch of its own."""
+    batches: list[list] = []
+    for tool_call in tool_calls:
+        if tool_call.function.name.startswith(SERIAL_TOOL_PREFIXES):
+            batches.append([tool_call])
+        elif batches and not batches[-1][0].function.name.startswith(SERIAL_TOOL_PREFIXES):
+            batches[-1].append(tool_call)
+        else:
+            batches.append([tool_call])
+    return batches
+
+
 def _mask_old_observations(messages: list[dict], window: int) -> list[dict]:
     """Aggressively compress older messages to reduce context size.
 
@@ -0,0 +1,112 @@
+"""Benchmark the fuzzy match engines on recorded catalogs.
+
+A catalog is a scrape result handle ("shopify-…", "crawl-…") or a file of
+rows: a JSON array, NDJSON, or gzipped NDJSON (the payload store's format).
+For each engine the benchmark times match_products and its pass 3 candidate
+index, and reports recall against a reference: the difflib engine, or with
+exhaustive=True SequenceMatcher scoring of every pair.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from tokyoradar_shared.results import iter_results
+
+from agent.matching import (
+    FUZZY_THRESHOLD,
+    MATCH_ENGINES,
+    build_index,
+    match_products,
+    normalize_name,
+    prepare_rows,
+)
+
+
+def load_catalog(source: str, brand_name: str | None = None) -> list[dict]:
+    """Rows of a result handle or catalog file, prepared for match_products."""
+    path = Path(source)
+    if not path.exists():
+        return prepare_rows(iter_results(source), brand_name)
+    if path.suffix == ".json":
+        return prepare_rows(json.loads(path.read_text()), brand_name)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt") as fh:
+        return prepare_rows((json.loads(line) for line in fh if line.strip()), brand_name)
+
+
+def run_benchmark(
+    official: list[dict],
+    retailer: list[dict],
+    engines: tuple[str, ...] = MATCH_ENGINES,
+    exhaustive: bool = False,
+) -> list[dict]:
+    """One row per engine: runtimes, match/candidate counts and recall."""
+    runs = []
+    for engine in engines:
+        started = time.perf_counter()
+        matches = match_products(official, retailer, "benchmark", engine=engine)
+        match_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        candidates = _candidate_pairs(build_index(engine, official, retailer), len(official))
+        candidate_seconds = time.perf_counter() - started
+
+        runs.append({
+            "engine": engine,
+            "match_seconds": match_seconds,
+            "matches": {(m.official_name, m.retailer_product_name, m.retailer_url) for m in matches},
+            "candidate_seconds": candidate_seconds,
+            "candidates": candidates,
+        })
+
+    if exhaustive:
+        reference_candidates = _exhaustive_pairs(official, retailer)
+    else:
+        reference_candidates = next(
+            (r["candidates"] for r in runs if r["engine"] == "difflib"),
+            None,
+        )
+        if reference_candidates is None:
+            reference_candidates = _candidate_pairs(build_index("difflib", official, retailer), len(official))
+    reference_matches = next((r["matches"] for r in runs if r["engine"] == "difflib"), None)
+
+    results = []
+    for run in runs:
+        results.append({
+            "engine": run["engine"],
+            "match_seconds": round(run["match_seconds"], 3),
+            "matches": len(run["matches"]),
+            "match_recall": _recall(run["matches"], reference_matches),
+            "candidate_seconds": round(run["candidate_seconds"], 3),
+            "candidates": len(run["candidates"]),
+            "candidate_recall": _recall(run["candidates"], reference_candidates),
+        })
+    return results
+
+
+def _candidate_pairs(index, official_count: int) -> set[tuple[int, int]]:
+    return {(k, i) for k in range(official_count) for i, _ in index.scores(k)}
+
+
+def _exhaustive_pairs(official: list[dict], retailer: list[dict]) -> set[tuple[int, int]]:
+    names = [normalize_name(rp.get("name", "") or rp.get("name_en", "")) for rp in retailer]
+    pairs = set()
+    for k, op in enumerate(official):
+        op_name = normalize_name(op.get("name", "") or op.get("name_en", ""))
+        for i, name in enumerate(names):
+            if SequenceMatcher(None, op_name, name).ratio() >= FUZZY_THRESHOLD:
+                pairs.add((k, i))
+    return pairs
+
+
+def _recall(found: set, reference: set | None) -> float | None:
+    if reference is None:
+        return None
+    if not reference:
+        return 1.0
+    return round(len(found & reference) / len(reference), 4)
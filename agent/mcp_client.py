@@ -1,19 +1,169 @@
-"""MCP Client adapter — connects to MCP servers and wraps tools as ToolDefs."""
+"""MCP Client adapter — connects to MCP servers and wraps tools as ToolDefs.
+
+MCP sessions are async; tools are called both from plain threads (AgentLoop)
+and from coroutines (AsyncAgentLoop). Rather than spinning up an event loop,
+an HTTP connection and an MCP handshake for every call, the sessions live on
+the process's background loop (agent.runtime), which keeps a small pool of
+initialized ClientSessions per server URL. Sync handlers submit their call to
+that loop and block on the result; async handlers await it. A session that
+fails is discarded and the call retried on a fresh one; the pool's other idle
+sessions are dropped too only when the failure shows the connection is gone
+(a restarted server), so one failed call doesn't reconnect every session.
+"""
 
 from __future__ import annotations
 
 import asyncio
 import json
 import logging
+import os
 from typing import Any
 
+import anyio
+import httpx
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 
+from agent.runtime import get_background_loop
 from agent.tools import ToolDef
 
 logger = logging.getLogger(__name__)
 
+MCP_SESSIONS_PER_SERVER = 8  # concurrent calls per server before callers wait
+MCP_CONNECT_TIMEOUT = 30.0  # seconds to connect and initialize a session
+
+
+class _PooledSession:
+    """One initialized ClientSession, owned by a background task.
+
+    The streamable-HTTP transport and the session are anyio context managers
+    that must be entered and exited by the same task, so a dedicated task holds
+    them open until close(); calls from other tasks go through self.session.
+    """
+
+    def __init__(self, server_url: str) -> None:
+        self.server_url = server_url
+        self.session: ClientSession | None = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: BaseException | None = None
+        self._task: asyncio.Task | None = None
+
+    async def open(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._ready.wait(), MCP_CONNECT_TIMEOUT)
+        if self.session is None:
+            raise self._error or ConnectionError(f"MCP session to {self.server_url} closed")
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            await asyncio.wait([self._task], timeout=5)
+            if not self._task.done():
+                self._task.cancel()
+
+    async def _run(self) -> None:
+        try:
+            async with streamablehttp_client(self.server_url) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as exc:
+            self._error = exc
+            logger.debug("MCP session to %s ended: %s", self.server_url, exc)
+        finally:
+            self.session = None
+            self._ready.set()
+
+
+class _SessionPool:
+    """Idle initialized sessions for one server URL, at most `size` open at once."""
+
+    def __init__(self, server_url: str, size: int = MCP_SESSIONS_PER_SERVER) -> None:
+        self.server_url = server_url
+        self.size = size
+        self._idle: list[_PooledSession] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def acquire(self) -> _PooledSession:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                pooled = self._idle.pop()
+                if pooled.alive:
+                    return pooled
+                await pooled.close()
+            pooled = _PooledSession(self.server_url)
+            try:
+                await pooled.open()
+            except BaseException:
+                await pooled.close()
+                raise
+            return pooled
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, pooled: _PooledSession, error: BaseException | None = None) -> None:
+        """Return a session after a call; error is what the call raised, if anything."""
+        try:
+            if error is None and pooled.alive:
+                self._idle.append(pooled)
+                return
+            # A session that raised may be half-dead; never hand it out again
+            dead = not pooled.alive or _is_connection_error(error)
+            await pooled.close()
+            if dead:
+                # Usually the server restarted: its other idle sessions are stale too
+                await self.close()
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await pooled.close()
+
+
+def _is_connection_error(exc: BaseException | None) -> bool:
+    """Whether a call failure means the connection itself is gone, not just the call."""
+    return isinstance(exc, (
+        OSError,
+        httpx.TransportError,
+        anyio.ClosedResourceError,
+        anyio.BrokenResourceError,
+        anyio.EndOfStream,
+    ))
+
+
+# Session pools of this process, by server URL (only touched from the background loop)
+_pools: dict[str, _SessionPool] = {}
+_pools_pid: int | None = None
+
+
+def _get_pool(server_url: str) -> _SessionPool:
+    global _pools_pid
+    if _pools_pid != os.getpid():
+        # First use, or a forked worker: inherited sessions belong to the parent's loop
+        _pools.clear()
+        _pools_pid = os.getpid()
+        get_background_loop().on_shutdown(_close_pools)
+    pool = _pools.get(server_url)
+    if pool is None:
+        pool = _pools[server_url] = _SessionPool(server_url)
+    return pool
+
+
+async def _close_pools() -> None:
+    for pool in list(_pools.values()):
+        await pool.close()
+
 
 class MCPToolAdapter:
     """Discovers tools from MCP servers and wraps them as ToolDefs for the AgentLoop."""
@@ -21,7 +171,7 @@ class MCPToolAdapter:
     def get_tool_defs(self, server_url: str) -> dict[str, ToolDef]:
         """Connect to an MCP server, list tools, and return wrapped ToolDefs."""
         try:
-            return asyncio.run(self._discover_tools(server_url))
+            return get_background_loop().run(self._discover_tools(server_url))
         except Exception as exc:
             logger.error("Failed to connect to MCP server %s: %s", server_url, exc)
             return {}
@@ -29,39 +179,64 @@ class MCPToolAdapter:
     async def _discover_tools(self, server_url: str) -> dict[str, ToolDef]:
         tools: dict[str, ToolDef] = {}
 
-        async with streamablehttp_client(server_url) as (read_stream, write_stream, _):
-            async with ClientSession(read_stream, write_stream) as session:
-                await session.initialize()
-                result = await session.list_tools()
+        pool = _get_pool(server_url)
+        pooled = await pool.acquire()
+        error: BaseException | None = None
+        try:
+            result = await pooled.session.list_tools()
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            await pool.release(pooled, error)
 
-                for tool_info in result.tools:
-                    name = tool_info.name
-                    description = tool_info.description or ""
-                    input_schema = tool_info.inputSchema or {"type": "object", "properties": {}}
+        for tool_info in result.tools:
+            name = tool_info.name
+            description = tool_info.description or ""
+            input_schema = tool_info.inputSchema or {"type": "object", "properties": {}}
 
-                    handler = self._make_handler(server_url, name)
+            handler = self._make_handler(server_url, name)
 
-                    tools[name] = ToolDef(
-                        name=name,
-                        description=description,
-                        input_schema=input_schema,
-                        handler=handler,
-                    )
+            tools[name] = ToolDef(
+                name=name,
+                description=description,
+                input_schema=input_schema,
+                handler=handler,
+                async_handler=self._make_async_handler(server_url, name),
+            )
 
         return tools
 
     def _make_handler(self, server_url: str, tool_name: str):
-        """Create a synchronous handler that calls the MCP tool."""
+        """Create a synchronous handler that calls the MCP tool on the shared loop."""
 
         def handler(**kwargs: Any) -> Any:
             try:
-                return asyncio.run(self._call_tool(server_url, tool_name, kwargs))
+                return get_background_loop().run(self._call_tool(server_url, tool_name, kwargs))
             except Exception as exc:
                 logger.error("MCP tool %s failed: %s", tool_name, exc)
                 return {"error": f"MCP tool call failed: {exc}"}
 
         return handler
 
+    def _make_async_handler(self, server_url: str, tool_name: str):
+        """Create a coroutine handler for AsyncAgentLoop; awaits the shared loop without a thread."""
+
+        async def handler(**kwargs: Any) -> Any:
+            return await self.call_tool(server_url, tool_name, kwargs)
+
+        return handler
+
+    async def call_tool(self, server_url: str, tool_name: str, arguments: dict) -> Any:
+        """Call an MCP tool from any event loop; failures come back as {"error": ...}."""
+        try:
+            return await get_background_loop().submit(
+                self._call_tool(server_url, tool_name, arguments)
+            )
+        except Exception as exc:
+            logger.error("MCP tool %s failed: %s", tool_name, exc)
+            return {"error": f"MCP tool call failed: {exc}"}
+
     async def _call_tool(
         self, server_url: str, tool_name: str, arguments: dict, _retries: int = 2,
     ) -> Any:
@@ -80,26 +255,32 @@ class MCPToolAdapter:
         raise last_exc  # type: ignore[misc]
 
     async def _call_tool_once(self, server_url: str, tool_name: str, arguments: dict) -> Any:
-        async with streamablehttp_client(server_url) as (read_stream, write_stream, _):
-            async with ClientSession(read_stream, write_stream) as session:
-                await session.initialize()
-                result = await session.call_tool(tool_name, arguments=arguments)
-
-                # MCP returns content as list of content blocks
-                if result.content:
-                    # If single text block, try to parse as JSON
-                    if len(result.content) == 1 and result.content[0].type == "text":
-                        text = result.content[0].text
-                        try:
-                            return json.loads(text)
-                        except (json.JSONDecodeError, TypeError):
-                            return {"result": text}
-                    # Multiple blocks — concatenate text
-                    texts = [c.text for c in result.content if hasattr(c, "text")]
-                    combined = "\n".join(texts)
-                    try:
-                        return json.loads(combined)
-                    except (json.JSONDecodeError, TypeError):
-                        return {"result": combined}
-
-                return {"result": None}
+        pool = _get_pool(server_url)
+        pooled = await pool.acquire()
+        error: BaseException | None = None
+        try:
+            result = await pooled.session.call_tool(tool_name, arguments=arguments)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            await pool.release(pooled, error)
+
+        # MCP returns content as list of content blocks
+        if result.content:
+            # If single text block, try to parse as JSON
+            if len(result.content) == 1 and result.content[0].type == "text":
+                text = result.content[0].text
+                try:
+                    return json.loads(text)
+                except (json.JSONDecodeError, TypeError):
+                    return {"result": text}
+            # Multiple blocks — concatenate text
+            texts = [c.text for c in result.content if hasattr(c, "text")]
+            combined = "\n".join(texts)
+            try:
+                return json.loads(combined)
+            except (json.JSONDecodeError, TypeError):
+                return {"result": combined}
+
+        return {"result": None}
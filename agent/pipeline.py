@@ -0,0 +1,178 @@
+"""Deterministic scrape → match → save for a brand's registered channels.
+
+For brands in the retailer registry the research steps are always the same:
+scrape the official store, scrape each retailer, match retailer products to
+the official catalog, save items and listings. sync_registered_channels runs
+that sequence without the LLM. Scrapes go through the scraper MCP server and
+saves through the backend MCP server, by result handle, so no product rows
+pass through the agent's messages; matching uses match_products without LLM
+disambiguation (exact SKU/name and high-confidence fuzzy matches only).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Any
+
+from tokyoradar_shared.config import settings
+from tokyoradar_shared.results import ResultWriter, iter_results
+from tokyoradar_shared.retailer_registry import RetailerSource, get_retailer_sources
+
+from agent.matching import ProductMatch, match_products, prepare_rows
+from agent.mcp_client import MCPToolAdapter
+
+logger = logging.getLogger(__name__)
+
+CRAWL_MAX_PAGES = 8  # same budget the prompt gives crawl_products
+
+
+async def sync_registered_channels(brand_slug: str) -> dict:
+    """Scrape, match and save every registered channel of a brand; returns a summary."""
+    sources = get_retailer_sources(brand_slug)
+    if not sources:
+        return {"error": f"Brand '{brand_slug}' has no registered channels"}
+    official = next((src for src in sources if src.tier == "official"), None)
+    if official is None:
+        return {"error": f"Brand '{brand_slug}' has no registered official store to match against"}
+
+    adapter = MCPToolAdapter()
+    brand = await _backend(adapter, "get_brand_info", brand_slug=brand_slug)
+    if brand.get("error"):
+        return brand
+
+    # Every channel scrapes at once; the scraper server's per-tool limits pace them
+    brand_name = brand.get("name_en") or brand_slug
+    scrapes = await asyncio.gather(*(_scrape(adapter, src, brand_name) for src in sources))
+    channels: dict[str, dict] = {}
+    for src, scraped in zip(sources, scrapes):
+        channels[src.retailer_slug] = {
+            "scraper_type": src.scraper_type,
+            "scraped": scraped.get("count", 0),
+        }
+        if scraped.get("error"):
+            channels[src.retailer_slug]["error"] = scraped["error"]
+
+    summary: dict[str, Any] = {"brand_slug": brand_slug, "items_saved": 0, "channels": channels}
+    official_scrape = scrapes[sources.index(official)]
+    if not official_scrape.get("result_handle"):
+        summary["error"] = "Official store scrape failed; nothing to match retailer products against"
+        return summary
+
+    # Items first: the listings below resolve to them by name
+    saved = await _backend(
+        adapter, "save_items", brand_slug=brand_slug, result_handle=official_scrape["result_handle"],
+    )
+    if saved.get("error"):
+        summary["error"] = f"save_items failed: {saved['error']}"
+        return summary
+    summary["items_saved"] = saved.get("saved", 0)
+    summary["items_handle"] = saved.get("items_handle")  # read by the session snapshot
+    channels[official.retailer_slug].update(_listing_summary(await _backend(
+        adapter, "save_price_listings",
+        result_handle=official_scrape["result_handle"],
+        retailer_slug=official.retailer_slug,
+        brand_slug=brand_slug,
+    )))
+
+    official_rows = await asyncio.to_thread(_load_rows, official_scrape["result_handle"])
+    retailers = [
+        (src, scraped) for src, scraped in zip(sources, scrapes)
+        if src is not official and scraped.get("result_handle")
+    ]
+    # Matching and saving are independent per retailer
+    results = await asyncio.gather(*(
+        _match_and_save(adapter, brand_slug, brand_name, src, scraped["result_handle"], official_rows)
+        for src, scraped in retailers
+    ))
+    for (src, _), result in zip(retailers, results):
+        channels[src.retailer_slug].update(result)
+
+    logger.info("Synced %d registered channels for %s", len(sources), brand_slug)
+    summary["note"] = (
+        "Registered channels are scraped, matched and saved. Research only buy_guide "
+        "channels that are not listed here."
+    )
+    return summary
+
+
+async def _scrape(adapter: MCPToolAdapter, src: RetailerSource, brand_name: str) -> dict:
+    if src.scraper_type == "shopify":
+        return await _scraper(adapter, "scrape_shopify_store", domain=src.domain)
+    if src.scraper_type == "sitemap":
+        return await _scraper(adapter, "scrape_sitemap", domain=src.domain, brand_name=brand_name)
+    start_url = src.search_url_template or f"https://{src.domain}{src.path_prefix or ''}"
+    result = await _scraper(adapter, "crawl_products", start_url=start_url, max_pages=CRAWL_MAX_PAGES)
+    if "products_found" in result:
+        result["count"] = result["products_found"]
+    return result
+
+
+async def _match_and_save(
+    adapter: MCPToolAdapter,
+    brand_slug: str,
+    brand_name: str,
+    src: RetailerSource,
+    handle: str,
+    official_rows: list[dict],
+) -> dict:
+    rows = await asyncio.to_thread(_load_rows, handle, brand_name)
+    matches = await asyncio.to_thread(
+        match_products, official_rows, rows, src.retailer_slug, engine=settings.MATCH_ENGINE,
+    )
+    if not matches:
+        return {"matched": 0, "saved": 0}
+
+    # Listing rows carry the official name, so save_price_listings resolves the item
+    by_url = {row["source_url"]: row for row in rows if row.get("source_url")}
+    with ResultWriter("matches") as listings:
+        for match in matches:
+            listings.write(_listing_row(match, by_url.get(match.retailer_url) or {}))
+    saved = await _backend(
+        adapter, "save_price_listings",
+        result_handle=listings.handle,
+        retailer_slug=src.retailer_slug,
+        brand_slug=brand_slug,
+    )
+    return {
+        **_listing_summary(saved),
+        "matched": len(matches),
+        "match_methods": dict(Counter(m.match_method for m in matches)),
+    }
+
+
+def _load_rows(handle: str, brand_name: str | None = None) -> list[dict]:
+    return prepare_rows(iter_results(handle), brand_name)
+
+
+def _listing_row(match: ProductMatch, row: dict) -> dict:
+    return {
+        "name": match.official_name,
+        "product_url": match.retailer_url,
+        "price_usd": row.get("price_usd"),
+        "price": row.get("price"),
+        "currency": row.get("currency"),
+        "in_stock": match.retailer_in_stock,
+    }
+
+
+def _listing_summary(output: dict) -> dict:
+    if output.get("error"):
+        return {"error": f"save_price_listings failed: {output['error']}"}
+    summary = {"saved": output.get("saved", 0)}
+    if output.get("errors"):
+        summary["save_errors"] = output["errors"][:5]
+    return summary
+
+
+async def _scraper(adapter: MCPToolAdapter, tool: str, **arguments: Any) -> dict:
+    return _as_dict(await adapter.call_tool(settings.SCRAPER_MCP_URL, tool, arguments))
+
+
+async def _backend(adapter: MCPToolAdapter, tool: str, **arguments: Any) -> dict:
+    return _as_dict(await adapter.call_tool(settings.BACKEND_MCP_URL, tool, arguments))
+
+
+def _as_dict(output: Any) -> dict:
+    return output if isinstance(output, dict) else {"error": f"Unexpected tool output: {output!r}"}
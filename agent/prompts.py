@@ -11,6 +11,10 @@ STEP 1 — Gather context (call ALL THREE in parallel, every time):
   - list_retailers() → all retailer slugs for mapping channel names
 
 STEP 2 — Evaluate & decide path:
+  0) get_brand_info.registered_channels is non-empty → call sync_registered_channels(brand_slug)
+     FIRST. It scrapes, matches and saves those channels server-side in one call.
+     Afterwards, do STEP 3/4 ONLY for buy_guide channels whose retailer is NOT in
+     registered_channels. If every channel is registered, go straight to STEP 5.
   A) buy_guide.best_channels has URLs → you MUST scrape EVERY channel URL.
      For EACH channel in the array:
        1. Copy the "url" field EXACTLY as-is (do NOT modify the URL)
@@ -39,19 +43,22 @@ STEP 3 — Scrape channels:
   fetch_page is ONLY for single product detail pages or non-product discovery pages.
   If detect_platform returns "generic", you MUST use crawl_products.
 
-  After scraping, call save_items(brand_slug, [...]) to persist ALL products.
-  CRITICAL: Include EVERY product from the crawl CSV — do NOT skip or filter items.
-  Pass ALL fields from the CSV: name, price, currency, image_url, source_url.
-  save_items handles deduplication internally — just pass everything.
-  save_items returns item IDs needed for STEP 4.
+  Scraping tools keep ALL products server-side and return a small sample + result_handle.
+  After scraping the brand's OWN store, call save_items(brand_slug, result_handle=<handle>)
+  to persist ALL its products. Retailer handles (buy_guide channels, web_search results) are
+  NOT items: pass them ONLY to save_price_listings in STEP 4 — save_items rejects them.
+  CRITICAL: Pass the result_handle — do NOT copy rows from the sample CSV into items.
+  The server maps every stored field (name, price, currency, image_url, product_url) itself
+  and handles deduplication. Use items=[...] only for products you read with fetch_page.
 
 STEP 4 — Save price listings:
-  - Use item IDs from save_items (STEP 3) or search_items_db (STEP 1)
-  - For each retailer source that returned products:
-    - Match scraped products to DB items by name/SKU
-    - Call save_price_listings ONCE PER RETAILER with matched listings
-    - EACH listing MUST include: item_id, retailer_slug, price (price_usd or price_jpy), url
-    - The "url" field = the product_url from crawl_products CSV output (the link to buy)
+  - For each retailer source that returned products (a result_handle):
+    - Call save_price_listings(result_handle=<handle>, retailer_slug=..., brand_slug=...)
+      ONCE PER RETAILER. The server matches rows to the brand's items by name/URL and
+      returns matched / unmatched counts with a sample of unmatched names.
+    - Only for listings you built by hand (fetch_page), pass listings=[...] where EACH
+      listing includes item_id (from save_items or search_items_db), retailer_slug,
+      price (price_usd or price_jpy) and url (the product_url — the link to buy)
     - retailer_slug MUST come from list_retailers() or valid_retailer_slugs in get_brand_info
     - For any Japanese brand's official store → use "brand-official-jp"
     - For SSENSE → "ssense", END. → "end-clothing", Farfetch → "farfetch"
@@ -88,16 +95,21 @@ NEVER guess or fabricate a retailer_slug. If you can't find a match, skip that r
 </retailer_slugs>
 
 <tool_selection>
+- sync_registered_channels(brand_slug) → ONE call covers every registered channel; use it
+  whenever get_brand_info lists registered_channels
 - detect_platform(domain) → call FIRST on any unknown domain to pick the right scraper
 - scrape_shopify_store(domain) → ONLY for platform="shopify" confirmed domains
 - crawl_products(start_url, max_pages=8) → for ALL listing/category/brand pages on generic sites.
-  Returns CSV: name|price|currency|image_url|product_url|in_stock.
+  Returns products_found, a 10-row sample CSV (name|price|currency|image_url|product_url|in_stock)
+  and a result_handle. Official-store handles go to save_items, every handle to save_price_listings.
   This is your PRIMARY scraping tool for non-Shopify sites.
 - fetch_page(url) → ONLY for single product detail pages or discovering the right listing URL.
   NEVER use fetch_page to scrape an entire store. Use crawl_products instead.
 - scrape_sitemap(domain, brand_name) → fallback for bot-protected sites
-- save_items(brand_slug, items) → MUST call before save_price_listings (creates item IDs)
-- save_price_listings(listings) → saves prices linked to item IDs + retailer slugs
+- read_results(result_handle, offset, name_query?) → inspect stored rows beyond the sample; rarely needed
+- save_items(brand_slug, result_handle=...) → official-store handle only; MUST call before
+  save_price_listings (creates item IDs)
+- save_price_listings(result_handle=..., retailer_slug=..., brand_slug=...) → saves prices linked to items
 - web_search(query) → discover retailers when buy_guide is empty
 </tool_selection>
 
@@ -147,12 +159,12 @@ ABSOLUTE RULES — violating these corrupts the database:
 
 6. Use EXACT buy_guide URLs — do NOT modify paths, locales, or query parameters.
 
-7. If crawl_products or fetch_page returned product images, include primary_image_url in save_items.
-8. save_items field mapping from crawl_products CSV:
-   - name → name, price+currency → price_jpy (if JPY) or price_usd (if USD)
-   - image_url → primary_image_url, product_url → source_url, in_stock → in_stock
+7. If fetch_page returned product images, include primary_image_url in save_items items.
+8. For scraped sources, ALWAYS save by result_handle. The server maps the stored rows
+   (price+currency → price_jpy or price_usd, image_url → primary_image_url,
+   product_url → source_url), so prices and URLs reach the DB exactly as scraped.
 9. Save ALL items from EVERY crawl source. Do NOT cherry-pick or filter products.
-   The database handles deduplication — your job is to pass everything through.
+   The database handles deduplication — your job is to pass every handle through.
 </data_integrity>
 
 <constraints>
@@ -178,3 +190,20 @@ Candidates from {retailer_name}:
 Respond: [{{"candidate_index": N, "is_match": true/false, "confidence": 0.0-1.0}}]
 Only is_match=true if confidence >= 0.8. Markup of 10-30% is normal.
 """
+
+MATCHING_BATCH_PROMPT_TEMPLATE = """\
+Match retailer products to official products. Each group below is one official
+product and its candidates from {retailer_name}; judge every group on its own.
+Respond with JSON only.
+
+{groups_text}
+
+Respond: {{"groups": [{{"group": G, "matches": [{{"candidate_index": N, "is_match": true/false, "confidence": 0.0-1.0}}]}}]}}
+Include every group. Only is_match=true if confidence >= 0.8. Markup of 10-30% is normal.
+"""
+
+MATCHING_BATCH_GROUP_TEMPLATE = """\
+Group {group}
+Official: {official_name} | SKU: {official_sku} | ${official_price} | {official_material} | Colors: {official_colors}
+{candidates_text}
+"""
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import itertools
 import json
 from datetime import datetime
 from pathlib import Path
@@ -13,8 +14,17 @@ class SessionRecorder:
 
     def __init__(self, session_dir: Path) -> None:
         session_dir.mkdir(parents=True, exist_ok=True)
-        self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.file = session_dir / f"{self.session_id}.jsonl"
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Concurrent runs in one worker can start within the same second;
+        # claim the file exclusively and suffix the id until it's free
+        self.session_id = stamp
+        for n in itertools.count(2):
+            self.file = session_dir / f"{self.session_id}.jsonl"
+            try:
+                self.file.open("x").close()
+                break
+            except FileExistsError:
+                self.session_id = f"{stamp}_{n}"
         self._entries: list[dict] = []
 
     def record_api_call(
@@ -43,8 +53,12 @@ class SessionRecorder:
         tool_input: dict,
         tool_output: Any,
         duration_ms: float,
+        cache: str | None = None,
     ) -> None:
-        """Append tool execution to the session file."""
+        """Append tool execution to the session file.
+
+        cache is "hit" or "miss" for tools behind the tool result cache.
+        """
         entry = {
             "type": "tool_exec",
             "name": tool_name,
@@ -53,6 +67,19 @@ class SessionRecorder:
             "duration_ms": round(duration_ms, 1),
             "timestamp": datetime.now().isoformat(),
         }
+        if cache:
+            entry["cache"] = cache
+        self._append(entry)
+
+    def record_tool_cache(self, by_tool: dict[str, dict]) -> None:
+        """Append the run's tool cache hit/miss counts (per tool and total)."""
+        entry = {
+            "type": "tool_cache",
+            "hits": sum(counts.get("hits", 0) for counts in by_tool.values()),
+            "misses": sum(counts.get("misses", 0) for counts in by_tool.values()),
+            "by_tool": by_tool,
+            "timestamp": datetime.now().isoformat(),
+        }
         self._append(entry)
 
     def _append(self, entry: dict) -> None:
@@ -0,0 +1,86 @@
+"""Per-process background event loop for the agent worker.
+
+Celery tasks and tool handlers are plain threads, but the agent's I/O (LLM
+calls, MCP sessions) is async. Each process runs one event loop in a daemon
+thread; threads hand it coroutines with run(), and coroutines already running
+on another loop can await it with submit(). Keeping MCP sessions and agent
+runs on the same loop lets many brand researches share one process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from collections.abc import Awaitable, Callable, Coroutine
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_TIMEOUT = 10.0  # seconds for shutdown hooks at interpreter exit
+
+
+class BackgroundLoop:
+    """An event loop running forever in a daemon thread."""
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self._shutdown_hooks: list[Callable[[], Awaitable[None]]] = []
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="agent-loop", daemon=True,
+        )
+        self._thread.start()
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result."""
+        if self.in_loop():
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() called from its own loop; await submit() instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def submit(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Await a coroutine on this loop from any event loop (directly when already on it)."""
+        if self.in_loop():
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def on_shutdown(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Register an async cleanup (e.g. closing sessions) run at interpreter exit."""
+        self._shutdown_hooks.append(hook)
+
+    def shutdown(self) -> None:
+        async def _run_hooks() -> None:
+            for hook in self._shutdown_hooks:
+                try:
+                    await hook()
+                except Exception as exc:
+                    logger.debug("Shutdown hook %r failed: %s", hook, exc)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_run_hooks(), self.loop).result(timeout=SHUTDOWN_TIMEOUT)
+        except Exception as exc:
+            logger.debug("Background loop shutdown incomplete: %s", exc)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_background: BackgroundLoop | None = None
+_background_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """The process's background loop; a forked worker starts its own (threads don't survive fork)."""
+    global _background
+    with _background_lock:
+        if _background is None or _background.pid != os.getpid():
+            _background = BackgroundLoop()
+            atexit.register(_background.shutdown)
+        return _background
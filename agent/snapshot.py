@@ -46,7 +46,7 @@ def build_snapshot(session_file: str, brand_slug: str) -> dict:
         tool_counts[name] = tool_counts.get(name, 0) + 1
         output = record.get("output", "")
 
-        if name == "save_items":
+        if name in ("save_items", "sync_registered_channels"):
             ids = _parse_save_items_output(output)
             item_ids.extend(ids)
 
@@ -100,7 +100,9 @@ def _empty_snapshot() -> dict:
 def _parse_save_items_output(output) -> list[int]:
     """Extract item IDs from save_items tool output.
 
-    Output format: {"saved": N, "errors": [...], "items_csv": "id|name\\n101|..."}
+    Output format: {"saved": N, "errors": [...], "items_csv": "id|name\\n101|..."},
+    or {"saved": N, "errors": [...], "items_handle": "items-..."} when saved from a
+    result handle (the ids are read back from the result store).
     """
     ids: list[int] = []
     if isinstance(output, str):
@@ -112,6 +114,15 @@ def _parse_save_items_output(output) -> list[int]:
     if not isinstance(output, dict):
         return ids
 
+    if output.get("items_handle"):
+        from tokyoradar_shared.results import iter_results
+
+        try:
+            ids.extend(int(row["id"]) for row in iter_results(output["items_handle"]))
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.warning("Could not read saved item ids from %s: %s", output["items_handle"], exc)
+        return ids
+
     csv_text = output.get("items_csv", "")
     if not csv_text:
         return ids
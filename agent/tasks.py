@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -35,16 +36,26 @@ def research_brand(
     """Run the agent to research a brand across all channels.
 
     Scrapes available sources, matches products, and saves price listings.
+    The run itself is async, on the process's background loop, so with the
+    threads pool (AGENT_WORKER_CONCURRENCY) one worker process drives many
+    researches at once; each task thread just waits for its run.
     """
-    from agent.core import AgentLoop
+    from agent.runtime import get_background_loop
+
+    return get_background_loop().run(_research_brand(brand_slug, model, job_id))
+
+
+async def _research_brand(brand_slug: str, model: str, job_id: int | None) -> dict:
+    from agent.core import AsyncAgentLoop
     from agent.prompts import ORCHESTRATOR_PROMPT
     from agent.recorder import SessionRecorder
+    from agent.tool_cache import tool_cache
     from agent.tools import get_all_tools
     from agent.tracker import TokenTracker
 
     # Mark job as running
     if job_id:
-        _update_job_status(job_id, status="running", started_at=datetime.now())
+        await asyncio.to_thread(_update_job_status, job_id, status="running", started_at=datetime.now())
 
     try:
         tracker = TokenTracker()
@@ -53,21 +64,22 @@ def research_brand(
         # Write session_file path immediately so the session endpoint can read
         # the JSONL file while the agent is still running (enables live view).
         if job_id:
-            _update_job_status(job_id, session_file=str(recorder.file))
+            await asyncio.to_thread(_update_job_status, job_id, session_file=str(recorder.file))
 
-        loop = AgentLoop(
-            tools=get_all_tools(),
+        loop = AsyncAgentLoop(
+            tools=await asyncio.to_thread(get_all_tools),
             system_prompt=ORCHESTRATOR_PROMPT,
             model=model,
             tracker=tracker,
             recorder=recorder,
+            tool_cache=tool_cache,
         )
 
         message = (
             f"Research {brand_slug}: scrape all available channels, "
             f"match products across sources, and save price listings."
         )
-        result = loop.run(message)
+        result = await loop.run(message)
 
         summary = {
             "brand_slug": brand_slug,
@@ -91,7 +103,7 @@ def research_brand(
             # Build snapshot of items + metrics from this run
             from agent.snapshot import build_snapshot
             try:
-                snapshot = build_snapshot(str(recorder.file), brand_slug)
+                snapshot = await asyncio.to_thread(build_snapshot, str(recorder.file), brand_slug)
             except Exception:
                 logger.exception("Failed to build snapshot for %s", brand_slug)
                 snapshot = None
@@ -100,7 +112,8 @@ def research_brand(
             if snapshot:
                 job_result["snapshot"] = snapshot
 
-            _update_job_status(
+            await asyncio.to_thread(
+                _update_job_status,
                 job_id,
                 status="completed",
                 completed_at=datetime.now(),
@@ -117,7 +130,8 @@ def research_brand(
     except Exception as exc:
         logger.exception("Agent research failed for %s", brand_slug)
         if job_id:
-            _update_job_status(
+            await asyncio.to_thread(
+                _update_job_status,
                 job_id,
                 status="failed",
                 completed_at=datetime.now(),
@@ -0,0 +1,160 @@
+"""Cross-run memoization of read-only tool results.
+
+Idempotent tools (platform detection, scrapes, DB lookups, web search) are
+cached by tool name plus canonical JSON arguments, with a TTL per tool, so
+re-researching a brand the same day skips the tool calls. Entries are shared
+across workers via Redis, with a bounded process-local fallback when Redis is
+unavailable. Error results are never cached.
+
+Writes invalidate by generation: each tool has a generation number that is
+part of its cache keys, and a successful save_* bumps the generation of the
+tools whose answers it can change, orphaning their old entries (they expire
+by TTL).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any
+
+from tokyoradar_shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds a tool result stays reusable; tools not listed are never cached
+TOOL_CACHE_TTL: dict[str, int] = {
+    "detect_platform": 24 * 3600,
+    # Scrape results carry a result_handle, which must outlive the entry
+    # (shared RESULT_TTL_SECONDS is 24 h)
+    "scrape_shopify_store": 6 * 3600,
+    "crawl_products": 12 * 3600,
+    "scrape_sitemap": 12 * 3600,
+    "get_brand_info": 24 * 3600,
+    "list_retailers": 24 * 3600,
+    "web_search": 24 * 3600,
+}
+# Cached tools whose answers a successful write can change
+WRITE_TOOL_PREFIX = "save_"
+INVALIDATED_BY_WRITES = ("get_brand_info", "list_retailers")
+LOCAL_MAX_ENTRIES = 512
+_KEY = "agent:tool_cache:{tool}:{generation}:{digest}"
+_GENERATION_KEY = "agent:tool_cache_gen:{tool}"
+
+
+def canonical_args(args: dict) -> str:
+    """Argument identity: key order and whitespace don't matter."""
+    return json.dumps(args, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ToolResultCache:
+    def __init__(self, redis_url: str | None = None, ttls: dict[str, int] | None = None) -> None:
+        self.redis_url = redis_url
+        self.ttls = TOOL_CACHE_TTL if ttls is None else ttls
+        self._local: dict[str, tuple[float, str]] = {}  # key -> (expires_at, output JSON)
+        self._generations: dict[str, int] = {}  # used without Redis
+        self._lock = threading.Lock()
+        self._redis = None
+
+    def cacheable(self, tool: str) -> bool:
+        return tool in self.ttls
+
+    def get(self, tool: str, args: dict) -> Any | None:
+        """Cached output for this call, or None."""
+        if not self.cacheable(tool):
+            return None
+        key = self._key(tool, args)
+        client = self._client()
+        if client is not None:
+            try:
+                value = client.get(key)
+                return json.loads(value) if value else None
+            except Exception as exc:
+                logger.debug("Tool cache lookup failed for %s: %s", tool, exc)
+
+        with self._lock:
+            cached = self._local.get(key)
+            if cached is None:
+                return None
+            if cached[0] <= time.time():
+                del self._local[key]
+                return None
+            return json.loads(cached[1])
+
+    def put(self, tool: str, args: dict, output: Any) -> None:
+        """Remember a successful output (errors and empty results are skipped)."""
+        if not self.cacheable(tool) or output is None:
+            return
+        if isinstance(output, dict) and output.get("error"):
+            return
+        ttl = self.ttls[tool]
+        key = self._key(tool, args)
+        value = json.dumps(output, default=str)
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(key, value, ex=ttl)
+                return
+            except Exception as exc:
+                logger.debug("Tool cache store failed for %s: %s", tool, exc)
+
+        with self._lock:
+            self._local.pop(key, None)
+            self._local[key] = (time.time() + ttl, value)
+            while len(self._local) > LOCAL_MAX_ENTRIES:
+                del self._local[next(iter(self._local))]  # oldest first
+
+    def after_call(self, tool: str, output: Any) -> list[str]:
+        """Invalidation hook run after every executed call; returns the tools invalidated."""
+        if not tool.startswith(WRITE_TOOL_PREFIX):
+            return []
+        if isinstance(output, dict) and output.get("error"):
+            return []
+        stale = [name for name in INVALIDATED_BY_WRITES if self.cacheable(name)]
+        for name in stale:
+            self.invalidate(name)
+        return stale
+
+    def invalidate(self, tool: str) -> None:
+        """Drop every cached result of a tool (all arguments)."""
+        client = self._client()
+        if client is not None:
+            try:
+                client.incr(_GENERATION_KEY.format(tool=tool))
+                return
+            except Exception as exc:
+                logger.debug("Tool cache invalidation failed for %s: %s", tool, exc)
+        with self._lock:
+            self._generations[tool] = self._generations.get(tool, 0) + 1
+
+    def _key(self, tool: str, args: dict) -> str:
+        digest = hashlib.sha256(canonical_args(args).encode()).hexdigest()[:32]
+        return _KEY.format(tool=tool, generation=self._generation(tool), digest=digest)
+
+    def _generation(self, tool: str) -> int:
+        client = self._client()
+        if client is not None:
+            try:
+                value = client.get(_GENERATION_KEY.format(tool=tool))
+                return int(value) if value else 0
+            except Exception as exc:
+                logger.debug("Tool cache generation lookup failed for %s: %s", tool, exc)
+        with self._lock:
+            return self._generations.get(tool, 0)
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                return None
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.5)
+        return self._redis
+
+
+tool_cache = ToolResultCache(settings.REDIS_URL)
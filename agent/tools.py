@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +16,19 @@ class ToolDef:
     description: str
     input_schema: dict
     handler: Callable[..., Any]
+    # Coroutine version for AsyncAgentLoop; without one, handler runs in a thread
+    async_handler: Callable[..., Awaitable[Any]] | None = None
 
 
 TOOL_REGISTRY: dict[str, ToolDef] = {}
 
 
-def tool(name: str, description: str, input_schema: dict):
+def tool(
+    name: str,
+    description: str,
+    input_schema: dict,
+    async_handler: Callable[..., Awaitable[Any]] | None = None,
+):
     """Decorator to register a local tool."""
     def decorator(fn: Callable) -> Callable:
         TOOL_REGISTRY[name] = ToolDef(
@@ -29,6 +36,7 @@ def tool(name: str, description: str, input_schema: dict):
             description=description,
             input_schema=input_schema,
             handler=fn,
+            async_handler=async_handler,
         )
         return fn
     return decorator
@@ -81,6 +89,39 @@ def web_search(query: str) -> dict:
         return {"query": query, "error": str(exc)}
 
 
+async def _sync_registered_channels(brand_slug: str) -> dict:
+    from agent.pipeline import sync_registered_channels
+
+    return await sync_registered_channels(brand_slug)
+
+
+@tool(
+    name="sync_registered_channels",
+    description=(
+        "For brands whose get_brand_info lists registered_channels: scrapes the official "
+        "store and every registered retailer, matches retailer products to the official "
+        "catalog and saves items + price listings, all server-side. Call it ONCE, before "
+        "researching other channels. Returns a per-channel summary (scraped, matched, saved)."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "brand_slug": {
+                "type": "string",
+                "description": "Brand slug, e.g. 'nanamica'",
+            },
+        },
+        "required": ["brand_slug"],
+    },
+    async_handler=_sync_registered_channels,
+)
+def sync_registered_channels(brand_slug: str) -> dict:
+    """Run the registered-channel pipeline on the agent's background loop."""
+    from agent.runtime import get_background_loop
+
+    return get_background_loop().run(_sync_registered_channels(brand_slug))
+
+
 def get_all_tools() -> dict[str, ToolDef]:
     """Discover tools from MCP servers and merge with any local tools."""
     from tokyoradar_shared.config import settings
@@ -38,6 +38,7 @@ def trigger_scrape(
     result = celery_app.send_task(
         "scraper.tasks.trigger_brand_scrape",
         args=[body.brand_slug],
+        kwargs={"full": body.full},
         queue="scraper",
     )
 
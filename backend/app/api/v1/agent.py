@@ -8,6 +8,7 @@ from pathlib import Path
 from celery import Celery
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from tokyoradar_shared.results import iter_results
 
 from app.config import settings
 from app.database import get_db
@@ -450,7 +451,13 @@ def rebuild_snapshot(
             except (json.JSONDecodeError, TypeError):
                 output = {}
 
-        if name == "save_items" and isinstance(output, dict):
+        if name in ("save_items", "sync_registered_channels") and isinstance(output, dict):
+            if output.get("items_handle"):
+                try:
+                    item_ids.extend(int(row["id"]) for row in iter_results(output["items_handle"]))
+                except (KeyError, TypeError, ValueError):
+                    pass  # result expired; the snapshot just lacks these items
+                continue
             csv_text = output.get("items_csv", "")
             for csv_line in csv_text.strip().split("\n")[1:]:
                 parts = csv_line.split("|")
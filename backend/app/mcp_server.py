@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from decimal import Decimal
+from urllib.parse import urlparse
 
 from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.server import TransportSecuritySettings
@@ -11,6 +12,11 @@ from sqlalchemy import select
 
 from tokyoradar_shared.database import SessionLocal
 from tokyoradar_shared.models import Brand, Item, PriceListing, Retailer
+from tokyoradar_shared.results import ResultWriter, is_in_stock, select_results
+from tokyoradar_shared.retailer_registry import get_retailer_sources
+
+UNMATCHED_SAMPLE = 20  # unmatched row names echoed back by save_price_listings
+ERRORS_SHOWN = 20  # per-row errors echoed back in result_handle mode
 
 mcp = FastMCP(
     "TokyoRadar DB",
@@ -26,6 +32,7 @@ def get_brand_info(brand_slug: str) -> dict:
     """Get brand metadata, buy_guide channels, and valid retailer slugs.
     Use this FIRST to understand the brand before scraping.
     Returns valid_retailer_slugs — use ONLY these for save_price_listings.
+    registered_channels lists the channels sync_registered_channels scrapes, matches and saves.
     For any Japanese official store, use retailer_slug='brand-official-jp'."""
     with SessionLocal() as db:
         brand = db.execute(
@@ -52,6 +59,10 @@ def get_brand_info(brand_slug: str) -> dict:
             "price_range": brand.price_range,
             "buy_guide": brand.buy_guide,
             "valid_retailer_slugs": retailer_slug_map,
+            "registered_channels": [
+                {"retailer_slug": src.retailer_slug, "domain": src.domain, "scraper_type": src.scraper_type}
+                for src in get_retailer_sources(brand_slug)
+            ],
         }
 
 
@@ -97,31 +108,41 @@ def search_items_db(
 
 
 @mcp.tool()
-def save_price_listings(listings: list[dict]) -> dict:
-    """Save price listings to DB. Each listing MUST include:
+def save_price_listings(
+    listings: list[dict] | None = None,
+    result_handle: str | None = None,
+    retailer_slug: str | None = None,
+    brand_slug: str | None = None,
+    name_query: str | None = None,
+    in_stock_only: bool = False,
+) -> dict:
+    """Save price listings to DB. Either pass listings, each of which MUST include:
     - item_id (int): from save_items or search_items_db
     - retailer_slug (str): from list_retailers or valid_retailer_slugs
     - price_usd or price_jpy: the price at this retailer
     - url (str): direct link to the product page at this retailer (from product_url in crawl output)
-    Do NOT call until you have item IDs from save_items."""
+    or pass result_handle (from crawl_products / scrape_* at this retailer) with retailer_slug
+    and brand_slug: rows are matched server-side to the brand's items by name or URL.
+    Optional name_query / in_stock_only filter the handle's rows.
+    Do NOT call until the brand's items are saved (save_items)."""
+    if result_handle:
+        if not retailer_slug or not brand_slug:
+            return {"error": "result_handle requires retailer_slug and brand_slug"}
+        return _save_listings_from_results(
+            result_handle, retailer_slug, brand_slug, name_query, in_stock_only,
+        )
+    if listings is None:
+        return {"error": "Pass either listings or result_handle"}
+
     saved = 0
     errors = []
 
     with SessionLocal() as db:
         for listing_data in listings:
             try:
-                retailer = db.execute(
-                    select(Retailer).where(
-                        Retailer.slug == listing_data["retailer_slug"]
-                    )
-                ).scalar_one_or_none()
-
+                retailer = _get_retailer(db, listing_data["retailer_slug"])
                 if retailer is None:
-                    all_slugs = [r.slug for r in db.execute(select(Retailer.slug)).scalars().all()]
-                    errors.append(
-                        f"Retailer '{listing_data['retailer_slug']}' not found. "
-                        f"Valid slugs: {', '.join(sorted(all_slugs))}"
-                    )
+                    errors.append(_unknown_retailer(db, listing_data["retailer_slug"]))
                     continue
 
                 item = db.execute(
@@ -132,35 +153,7 @@ def save_price_listings(listings: list[dict]) -> dict:
                     errors.append(f"Item ID {listing_data['item_id']} not found")
                     continue
 
-                existing = db.execute(
-                    select(PriceListing).where(
-                        PriceListing.item_id == listing_data["item_id"],
-                        PriceListing.retailer_id == retailer.id,
-                    )
-                ).scalar_one_or_none()
-
-                if existing:
-                    if listing_data.get("price_usd") is not None:
-                        existing.price_usd = Decimal(str(listing_data["price_usd"]))
-                    if listing_data.get("price_jpy") is not None:
-                        existing.price_jpy = listing_data["price_jpy"]
-                    if "in_stock" in listing_data:
-                        existing.in_stock = listing_data["in_stock"]
-                    if listing_data.get("url"):
-                        existing.url = listing_data["url"]
-                    existing.last_checked_at = datetime.now()
-                else:
-                    pl = PriceListing(
-                        item_id=listing_data["item_id"],
-                        retailer_id=retailer.id,
-                        price_usd=Decimal(str(listing_data["price_usd"])) if listing_data.get("price_usd") else None,
-                        price_jpy=listing_data.get("price_jpy"),
-                        in_stock=listing_data.get("in_stock", True),
-                        url=listing_data.get("url"),
-                        last_checked_at=datetime.now(),
-                    )
-                    db.add(pl)
-
+                _upsert_listing(db, item.id, retailer, listing_data)
                 saved += 1
 
             except Exception as exc:
@@ -171,97 +164,204 @@ def save_price_listings(listings: list[dict]) -> dict:
     return {"saved": saved, "errors": errors}
 
 
-@mcp.tool()
-def save_items(brand_slug: str, items: list[dict]) -> dict:
-    """Upsert Item records for a brand. Creates new items or updates existing ones.
-    Match by external_id (if provided) or name+brand_id.
-    Input items: [{name, sku?, price_usd?, price_jpy?, external_id?, source_url?, material?, sizes?, in_stock?, primary_image_url?}]
-    Returns {saved: N, errors: [], items_csv: "id|name\\n..."} — use item IDs for save_price_listings."""
+def _save_listings_from_results(
+    result_handle: str,
+    retailer_slug: str,
+    brand_slug: str,
+    name_query: str | None,
+    in_stock_only: bool,
+) -> dict:
+    try:
+        rows = select_results(result_handle, name_query=name_query, in_stock_only=in_stock_only)
+    except KeyError as exc:
+        return {"error": exc.args[0]}
+
     saved = 0
+    matched = 0
     errors = []
-    result_items = []
+    unmatched = []
 
     with SessionLocal() as db:
         brand = db.execute(
             select(Brand).where(Brand.slug == brand_slug)
         ).scalar_one_or_none()
-
         if brand is None:
             return {"error": f"Brand '{brand_slug}' not found"}
 
-        for item_data in items:
+        retailer = _get_retailer(db, retailer_slug)
+        if retailer is None:
+            return {"error": _unknown_retailer(db, retailer_slug)}
+
+        by_name: dict[str, int] = {}
+        by_url: dict[str, int] = {}
+        for item_id, name_en, source_url in db.execute(
+            select(Item.id, Item.name_en, Item.source_url).where(Item.brand_id == brand.id)
+        ).all():
+            by_name.setdefault(_name_key(name_en), item_id)
+            if source_url:
+                by_url.setdefault(source_url, item_id)
+
+        # One query for every existing listing this batch can touch
+        listings_by_item = {
+            pl.item_id: pl
+            for pl in db.execute(
+                select(PriceListing)
+                .join(Item, Item.id == PriceListing.item_id)
+                .where(Item.brand_id == brand.id, PriceListing.retailer_id == retailer.id)
+            ).scalars()
+        }
+
+        for row in rows:
             try:
-                name = item_data.get("name", "").strip()
-                if not name:
-                    errors.append("Skipped item with empty name")
+                url = row.get("product_url") or row.get("url") or ""
+                item_id = by_url.get(url) or by_name.get(_name_key(row.get("name")))
+                if item_id is None:
+                    unmatched.append(row.get("name", "?"))
                     continue
-
-                external_id = item_data.get("external_id")
-
-                # Try to find existing item
-                existing = None
-                if external_id:
-                    existing = db.execute(
-                        select(Item).where(
-                            Item.brand_id == brand.id,
-                            Item.external_id == str(external_id),
-                        )
-                    ).scalar_one_or_none()
-
-                if existing is None:
-                    existing = db.execute(
-                        select(Item).where(
-                            Item.brand_id == brand.id,
-                            Item.name_en == name,
-                        )
-                    ).scalar_one_or_none()
-
-                if existing:
-                    # Update existing item
-                    if item_data.get("sku"):
-                        existing.sku = item_data["sku"]
-                    if item_data.get("price_usd") is not None:
-                        existing.price_usd = Decimal(str(item_data["price_usd"]))
-                    if item_data.get("price_jpy") is not None:
-                        existing.price_jpy = item_data["price_jpy"]
-                    if item_data.get("source_url"):
-                        existing.source_url = item_data["source_url"]
-                    if item_data.get("material"):
-                        existing.material = item_data["material"]
-                    if item_data.get("sizes"):
-                        existing.sizes = item_data["sizes"]
-                    if "in_stock" in item_data:
-                        existing.in_stock = item_data["in_stock"]
-                    if item_data.get("primary_image_url"):
-                        existing.primary_image_url = item_data["primary_image_url"]
-                    if external_id and not existing.external_id:
-                        existing.external_id = str(external_id)
-                    result_items.append((existing.id, existing.name_en))
-                else:
-                    # Create new item
-                    new_item = Item(
-                        brand_id=brand.id,
-                        name_en=name,
-                        sku=item_data.get("sku"),
-                        price_usd=Decimal(str(item_data["price_usd"])) if item_data.get("price_usd") else None,
-                        price_jpy=item_data.get("price_jpy"),
-                        external_id=str(external_id) if external_id else None,
-                        source_url=item_data.get("source_url"),
-                        material=item_data.get("material"),
-                        sizes=item_data.get("sizes"),
-                        in_stock=item_data.get("in_stock", True),
-                        primary_image_url=item_data.get("primary_image_url"),
-                    )
-                    db.add(new_item)
-                    db.flush()  # Get the ID
-                    result_items.append((new_item.id, new_item.name_en))
-
+                matched += 1
+                listing_data = {**_row_prices(row), "url": url or None}
+                if "in_stock" in row:
+                    listing_data["in_stock"] = is_in_stock(row["in_stock"])
+                _upsert_listing(db, item_id, retailer, listing_data, listings_by_item)
                 saved += 1
             except Exception as exc:
-                errors.append(f"Error saving '{item_data.get('name', '?')}': {exc}")
+                errors.append(f"Error saving listing '{row.get('name', '?')}': {exc}")
+
+        db.commit()
+
+    return {
+        "saved": saved,
+        "matched": matched,
+        "unmatched": len(unmatched),
+        "unmatched_sample": unmatched[:UNMATCHED_SAMPLE],
+        "errors": errors,
+    }
 
+
+def _upsert_listing(
+    db,
+    item_id: int,
+    retailer: Retailer,
+    listing_data: dict,
+    listings_by_item: dict[int, PriceListing] | None = None,
+) -> None:
+    """Insert or update the item's listing at this retailer.
+
+    listings_by_item, when given, holds the retailer's existing listings by
+    item id (preloaded for bulk saves) and is kept up to date.
+    """
+    if listings_by_item is not None:
+        existing = listings_by_item.get(item_id)
+    else:
+        existing = db.execute(
+            select(PriceListing).where(
+                PriceListing.item_id == item_id,
+                PriceListing.retailer_id == retailer.id,
+            )
+        ).scalar_one_or_none()
+
+    if existing:
+        if listing_data.get("price_usd") is not None:
+            existing.price_usd = Decimal(str(listing_data["price_usd"]))
+        if listing_data.get("price_jpy") is not None:
+            existing.price_jpy = listing_data["price_jpy"]
+        if "in_stock" in listing_data:
+            existing.in_stock = listing_data["in_stock"]
+        if listing_data.get("url"):
+            existing.url = listing_data["url"]
+        existing.last_checked_at = datetime.now()
+    else:
+        pl = PriceListing(
+            item_id=item_id,
+            retailer_id=retailer.id,
+            price_usd=Decimal(str(listing_data["price_usd"])) if listing_data.get("price_usd") else None,
+            price_jpy=listing_data.get("price_jpy"),
+            in_stock=listing_data.get("in_stock", True),
+            url=listing_data.get("url"),
+            last_checked_at=datetime.now(),
+        )
+        db.add(pl)
+        if listings_by_item is not None:
+            listings_by_item[item_id] = pl
+
+
+def _get_retailer(db, retailer_slug: str) -> Retailer | None:
+    return db.execute(
+        select(Retailer).where(Retailer.slug == retailer_slug)
+    ).scalar_one_or_none()
+
+
+def _unknown_retailer(db, retailer_slug: str) -> str:
+    all_slugs = db.execute(select(Retailer.slug)).scalars().all()
+    return f"Retailer '{retailer_slug}' not found. Valid slugs: {', '.join(sorted(all_slugs))}"
+
+
+@mcp.tool()
+def save_items(
+    brand_slug: str,
+    items: list[dict] | None = None,
+    result_handle: str | None = None,
+    name_query: str | None = None,
+    in_stock_only: bool = False,
+) -> dict:
+    """Upsert Item records for a brand. Creates new items or updates existing ones.
+    Match by external_id (if provided) or name+brand_id.
+    Either pass items: [{name, sku?, price_usd?, price_jpy?, external_id?, source_url?, material?, sizes?, in_stock?, primary_image_url?}]
+    and get back {saved: N, errors: [], items_csv: "id|name\\n..."} — use item IDs for save_price_listings;
+    or pass result_handle from a scrape of the brand's OWN store (crawl_products / scrape_*) to
+    save every stored row server-side (optionally filtered by name_query / in_stock_only) and get
+    back {saved, errors, items_handle}. Retailer handles are rejected: their products are
+    listings, saved with save_price_listings."""
+    if result_handle:
+        try:
+            rows = select_results(result_handle, name_query=name_query, in_stock_only=in_stock_only)
+        except KeyError as exc:
+            return {"error": exc.args[0]}
+    elif items is None:
+        return {"error": "Pass either items or result_handle"}
+
+    with SessionLocal() as db:
+        brand = db.execute(
+            select(Brand).where(Brand.slug == brand_slug)
+        ).scalar_one_or_none()
+
+        if brand is None:
+            return {"error": f"Brand '{brand_slug}' not found"}
+
+        if result_handle:
+            error = _check_official_rows(brand, rows)
+            if error:
+                return {"error": error}
+            items = [_item_from_row(row) for row in rows]
+
+        by_external, by_name = _brand_items(db, brand)
+        try:
+            with db.begin_nested():
+                result_items, errors = _upsert_items(db, brand, items, by_external, by_name)
+                db.flush()  # Assign ids to the new items in one round trip
+        except Exception:
+            # A row the database rejects fails the whole flush; redo the rows one
+            # savepoint each so only the bad ones are lost, with their errors
+            by_external, by_name = _brand_items(db, brand)
+            result_items, errors = _upsert_items(
+                db, brand, items, by_external, by_name, per_row=True,
+            )
+        saved = len(result_items)
+        result_items = [(item.id, item.name_en) for item in result_items]
         db.commit()
 
+    if result_handle:
+        # Ids stay server-side too; the snapshot and later tools read them by handle
+        with ResultWriter("items") as saved_items:
+            for item_id, item_name in result_items:
+                saved_items.write({"id": item_id, "name": item_name})
+        return {
+            "saved": saved,
+            "errors": errors[:ERRORS_SHOWN],
+            "error_count": len(errors),
+            "items_handle": saved_items.handle,
+        }
+
     # Build CSV of saved items
     lines = ["id|name"]
     for item_id, item_name in result_items:
@@ -274,6 +374,187 @@ def save_items(brand_slug: str, items: list[dict]) -> dict:
     }
 
 
+def _brand_items(db, brand: Brand) -> tuple[dict[str, Item], dict[str, Item]]:
+    """The brand's items by external_id and by name, loaded in one query."""
+    by_external: dict[str, Item] = {}
+    by_name: dict[str, Item] = {}
+    for item in db.execute(select(Item).where(Item.brand_id == brand.id)).scalars():
+        if item.external_id:
+            by_external[item.external_id] = item
+        by_name.setdefault(item.name_en, item)
+    return by_external, by_name
+
+
+def _upsert_items(
+    db,
+    brand: Brand,
+    items: list[dict],
+    by_external: dict[str, Item],
+    by_name: dict[str, Item],
+    per_row: bool = False,
+) -> tuple[list[Item], list[str]]:
+    """Upsert input rows; returns the saved items and per-row errors.
+
+    With per_row, each row is flushed in its own savepoint, so a row the
+    database rejects is reported and rolled back without losing the others.
+    """
+    saved: list[Item] = []
+    errors: list[str] = []
+    for item_data in items:
+        item = None
+        try:
+            name = item_data.get("name", "").strip()
+            if not name:
+                errors.append("Skipped item with empty name")
+                continue
+            if per_row:
+                with db.begin_nested():
+                    item = _upsert_item(db, brand, name, item_data, by_external, by_name)
+                    db.flush()
+            else:
+                item = _upsert_item(db, brand, name, item_data, by_external, by_name)
+            saved.append(item)
+        except Exception as exc:
+            errors.append(f"Error saving '{item_data.get('name', '?')}': {exc}")
+            if item is not None and item not in db:
+                # Its insert was rolled back; later rows must not resolve to it
+                for index in (by_external, by_name):
+                    for key in [k for k, v in index.items() if v is item]:
+                        del index[key]
+    return saved, errors
+
+
+def _check_official_rows(brand: Brand, rows: list[dict]) -> str | None:
+    """Error if any stored row comes from outside the brand's official store domains."""
+    official = {
+        _host(url) for url in (brand.website_jp, brand.website_us) if url
+    } | {
+        _host(src.domain) for src in get_retailer_sources(brand.slug) if src.tier == "official"
+    }
+    official.discard("")
+    if not official:
+        return (
+            f"Brand '{brand.slug}' has no official store domain on record, so result_handle "
+            "rows can't be verified as official products. Pass items=[...] instead."
+        )
+    foreign = sorted({
+        host for row in rows
+        if (host := _host(row.get("product_url") or row.get("url") or ""))
+        and not any(host == d or host.endswith("." + d) for d in official)
+    })
+    if foreign:
+        return (
+            f"result_handle holds products from {', '.join(foreign[:5])}, not the brand's official "
+            f"store ({', '.join(sorted(official))}). save_items only takes official-store results; "
+            "save retailer results with save_price_listings(result_handle=...)."
+        )
+    return None
+
+
+def _host(url: str) -> str:
+    if "://" not in url:
+        url = f"https://{url}"
+    return (urlparse(url).hostname or "").removeprefix("www.")
+
+
+def _upsert_item(
+    db,
+    brand: Brand,
+    name: str,
+    item_data: dict,
+    by_external: dict[str, Item],
+    by_name: dict[str, Item],
+) -> Item:
+    """Update the matching item or add a new one; by_external / by_name index the
+    brand's items and are kept up to date so repeats within a batch upsert too."""
+    external_id = item_data.get("external_id")
+
+    # Try to find existing item
+    existing = by_external.get(str(external_id)) if external_id else None
+    if existing is None:
+        existing = by_name.get(name)
+
+    if existing:
+        # Update existing item
+        if item_data.get("sku"):
+            existing.sku = item_data["sku"]
+        if item_data.get("price_usd") is not None:
+            existing.price_usd = Decimal(str(item_data["price_usd"]))
+        if item_data.get("price_jpy") is not None:
+            existing.price_jpy = item_data["price_jpy"]
+        if item_data.get("source_url"):
+            existing.source_url = item_data["source_url"]
+        if item_data.get("material"):
+            existing.material = item_data["material"]
+        if item_data.get("sizes"):
+            existing.sizes = item_data["sizes"]
+        if "in_stock" in item_data:
+            existing.in_stock = item_data["in_stock"]
+        if item_data.get("primary_image_url"):
+            existing.primary_image_url = item_data["primary_image_url"]
+        if external_id and not existing.external_id:
+            existing.external_id = str(external_id)
+            by_external[existing.external_id] = existing
+        return existing
+
+    # Create new item
+    new_item = Item(
+        brand_id=brand.id,
+        name_en=name,
+        sku=item_data.get("sku"),
+        price_usd=Decimal(str(item_data["price_usd"])) if item_data.get("price_usd") else None,
+        price_jpy=item_data.get("price_jpy"),
+        external_id=str(external_id) if external_id else None,
+        source_url=item_data.get("source_url"),
+        material=item_data.get("material"),
+        sizes=item_data.get("sizes"),
+        in_stock=item_data.get("in_stock", True),
+        primary_image_url=item_data.get("primary_image_url"),
+    )
+    db.add(new_item)
+    if new_item.external_id:
+        by_external[new_item.external_id] = new_item
+    by_name[name] = new_item
+    return new_item
+
+
+def _item_from_row(row: dict) -> dict:
+    """save_items input from a stored scrape row (crawl, store or sitemap shape)."""
+    item = {
+        "name": row.get("name") or "",
+        "source_url": row.get("product_url") or row.get("url") or None,
+        "primary_image_url": row.get("image_url") or None,
+        **_row_prices(row),
+    }
+    for field in ("sku", "external_id", "material", "sizes"):
+        if row.get(field):
+            item[field] = row[field]
+    if "in_stock" in row:
+        item["in_stock"] = is_in_stock(row["in_stock"])
+    return item
+
+
+def _row_prices(row: dict) -> dict:
+    """price_usd / price_jpy of a scrape row: store rows carry price_usd, crawl rows price+currency."""
+    prices = {}
+    if row.get("price_usd"):
+        prices["price_usd"] = Decimal(str(row["price_usd"]))
+    price = str(row.get("price") or "").replace(",", "")
+    currency = (row.get("currency") or "").upper()
+    try:
+        if price and currency == "JPY":
+            prices["price_jpy"] = int(Decimal(price))
+        elif price and currency == "USD" and "price_usd" not in prices:
+            prices["price_usd"] = Decimal(price)
+    except ArithmeticError:
+        pass
+    return prices
+
+
+def _name_key(name: str | None) -> str:
+    return " ".join((name or "").lower().split())
+
+
 @mcp.tool()
 def list_retailers() -> dict:
     """List all retailers in the DB with their slug, name, website, and shipping tier.
@@ -5,6 +5,7 @@ from pydantic import BaseModel, ConfigDict
 
 class ScrapeJobTrigger(BaseModel):
     brand_slug: str
+    full: bool = False  # force a full sweep instead of an incremental sync
 
 
 class ScrapeJobResponse(BaseModel):
@@ -18,6 +19,10 @@ class ScrapeJobResponse(BaseModel):
     items_found: int | None = None
     items_stored: int | None = None
     items_flagged: int | None = None
+    items_new: int | None = None
+    items_changed: int | None = None
+    items_unchanged: int | None = None
+    items_removed: int | None = None
     errors: dict | None = None
     flags: list[dict] | None = None
     config: dict | None = None
@@ -141,6 +141,10 @@ export interface ScrapeJob {
   items_found: number | null;
   items_stored: number | null;
   items_flagged: number | null;
+  items_new: number | null;
+  items_changed: number | null;
+  items_unchanged: number | null;
+  items_removed: number | null;
   errors: Record<string, unknown> | null;
   flags: ValidationFlagGroup[] | null;
   config: Record<string, unknown> | null;
@@ -0,0 +1,36 @@
+"""item content hash and scrape job change counts
+
+Revision ID: 3f9c2b7d81a4
+Revises: e1146908ad5c
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2b7d81a4'
+down_revision: Union[str, None] = 'e1146908ad5c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('items', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    op.add_column('scrape_jobs', sa.Column('items_new', sa.Integer(), nullable=True))
+    op.add_column('scrape_jobs', sa.Column('items_changed', sa.Integer(), nullable=True))
+    op.add_column('scrape_jobs', sa.Column('items_unchanged', sa.Integer(), nullable=True))
+    op.add_column('scrape_jobs', sa.Column('items_removed', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scrape_jobs', 'items_removed')
+    op.drop_column('scrape_jobs', 'items_unchanged')
+    op.drop_column('scrape_jobs', 'items_changed')
+    op.drop_column('scrape_jobs', 'items_new')
+
+    op.drop_column('items', 'content_hash')
@@ -0,0 +1,159 @@
+"""Async crawl engine behind the crawl_products MCP tool.
+
+Pages are fetched concurrently (global and per-host limits) from a FIFO
+frontier that deduplicates URLs when they are enqueued, within a page budget
+and a wall-clock budget. The frontier remembers 64-bit URL fingerprints
+rather than the URLs, and its queue is bounded by the page budget. Fetching runs in worker threads through
+_fetch_with_fallback. Page handling also runs off the event loop, so parsing
+a big page doesn't stall the server, but strictly one page at a time, so
+handlers can keep plain dict/set state without locks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urldefrag, urlparse
+
+from scraper.mcp_helpers import _fetch_with_fallback
+
+logger = logging.getLogger(__name__)
+
+CRAWL_MAX_CONCURRENCY = 6  # pages in flight across all hosts
+CRAWL_PER_HOST_CONCURRENCY = 3  # pages in flight per host
+CRAWL_TIME_BUDGET = 120.0  # seconds for a whole crawl
+FRONTIER_SLACK = 4  # queued URLs kept per page of budget (failed fetches don't count)
+
+
+def fingerprint(text: str) -> int:
+    """64-bit fingerprint for dedup sets — far smaller than the strings themselves."""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+class Frontier:
+    """FIFO crawl frontier; a URL is accepted at most once, ever."""
+
+    def __init__(self, max_queued: int | None = None) -> None:
+        self.max_queued = max_queued
+        self._queue: deque[str] = deque()
+        self._seen: set[int] = set()
+
+    def push(self, url: str) -> bool:
+        url = urldefrag(url)[0]
+        key = fingerprint(url)
+        if key in self._seen:
+            return False
+        if self.max_queued is not None and len(self._queue) >= self.max_queued:
+            return False  # could never be fetched within the page budget
+        self._seen.add(key)
+        self._queue.append(url)
+        return True
+
+    def mark_seen(self, url: str) -> None:
+        self._seen.add(fingerprint(urldefrag(url)[0]))
+
+    def pop(self) -> str:
+        return self._queue.popleft()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+@dataclass
+class CrawlStats:
+    pages_fetched: int = 0
+    errors: list[str] = field(default_factory=list)
+    budget_exhausted: bool = False
+
+
+class CrawlEngine:
+    def __init__(
+        self,
+        max_pages: int,
+        max_concurrency: int = CRAWL_MAX_CONCURRENCY,
+        per_host_concurrency: int = CRAWL_PER_HOST_CONCURRENCY,
+        time_budget: float = CRAWL_TIME_BUDGET,
+        fetch: Callable[[str], Any] = _fetch_with_fallback,
+    ) -> None:
+        self.max_pages = max_pages
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.time_budget = time_budget
+        self.fetch = fetch
+        self.frontier = Frontier(max_queued=max_pages * FRONTIER_SLACK)
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def run(
+        self,
+        start_url: str,
+        handle_page: Callable[[str, Any], Iterable[str]],
+    ) -> CrawlStats:
+        """Crawl from start_url. handle_page(url, resp) processes a fetched page
+        and returns the URLs it wants crawled next."""
+        stats = CrawlStats()
+        deadline = time.monotonic() + self.time_budget
+        in_flight: dict[asyncio.Task, str] = {}
+        self.frontier.push(start_url)
+
+        try:
+            while True:
+                while (
+                    self.frontier
+                    and len(in_flight) < self.max_concurrency
+                    and stats.pages_fetched + len(in_flight) < self.max_pages
+                ):
+                    url = self.frontier.pop()
+                    in_flight[asyncio.create_task(self._fetch(url))] = url
+                if not in_flight:
+                    break
+
+                remaining = deadline - time.monotonic()
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=max(remaining, 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    stats.budget_exhausted = True
+                    stats.errors.append(
+                        f"time budget of {self.time_budget:.0f}s exhausted; "
+                        f"{len(in_flight)} pages abandoned"
+                    )
+                    break
+
+                for task in done:
+                    url = in_flight.pop(task)
+                    try:
+                        resp = task.result()
+                    except Exception as exc:
+                        stats.errors.append(f"{url}: {exc}")
+                        continue
+                    stats.pages_fetched += 1
+
+                    final_url = str(resp.url) if hasattr(resp, "url") else url
+                    self.frontier.mark_seen(final_url)
+                    try:
+                        links = await asyncio.to_thread(handle_page, final_url, resp)
+                        for link in links:
+                            self.frontier.push(link)
+                    except Exception as exc:
+                        logger.exception("Crawl page handler failed for %s", final_url)
+                        stats.errors.append(f"{final_url}: {exc}")
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        return stats
+
+    async def _fetch(self, url: str):
+        host = urlparse(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        async with limit:
+            return await asyncio.to_thread(self.fetch, url)
@@ -0,0 +1,179 @@
+"""Process-wide pooled HTTP clients shared by the scrapers and the MCP tools.
+
+Clients are keyed by (domain, proxy) so repeated fetches against the same
+retailer reuse warm TLS sessions and keep-alive connections. Clients idle for
+longer than CLIENT_IDLE_EXPIRY are closed on the next lookup. A streamed
+response outlives the lookup that handed out its client, so streaming callers
+hold a lease (lease_client) and leased clients are never evicted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+CLIENT_TIMEOUT = 30.0
+CLIENT_IDLE_EXPIRY = 300.0  # seconds before an unused client is closed
+POOL_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=60.0,
+)
+
+
+@dataclass
+class _Entry:
+    client: Any  # httpx.Client | httpx.AsyncClient
+    last_used: float
+    loop: asyncio.AbstractEventLoop | None = None
+    leases: int = 0  # callers still using the client (e.g. reading a stream)
+
+
+class ClientRegistry:
+    """Thread-safe registry of pooled httpx clients."""
+
+    def __init__(self, idle_expiry: float = CLIENT_IDLE_EXPIRY) -> None:
+        self.idle_expiry = idle_expiry
+        self._entries: dict[tuple, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def client(self, domain: str, proxy_url: str | None = None) -> httpx.Client:
+        with self._lock:
+            return self._sync_entry(domain, proxy_url).client
+
+    @contextmanager
+    def lease(self, domain: str, proxy_url: str | None = None) -> Iterator[httpx.Client]:
+        """The pooled sync client, kept from idle eviction until the block exits."""
+        with self._lock:
+            entry = self._sync_entry(domain, proxy_url)
+            entry.leases += 1
+        try:
+            yield entry.client
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                entry.last_used = time.monotonic()
+
+    def async_client(self, domain: str, proxy_url: str | None = None) -> httpx.AsyncClient:
+        """Pooled AsyncClient for the running event loop (clients cannot cross loops)."""
+        loop = asyncio.get_running_loop()
+        key = ("async", domain, proxy_url, id(loop))
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(key)
+            if entry is None or entry.loop is not loop:
+                entry = self._entries[key] = _Entry(
+                    httpx.AsyncClient(**_client_kwargs(domain, proxy_url)), 0.0, loop,
+                )
+            entry.last_used = time.monotonic()
+            return entry.client
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            _close_entry(entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._entries),
+                "domains": sorted({key[1] for key in self._entries}),
+                "http2": HTTP2_AVAILABLE,
+            }
+
+    def _sync_entry(self, domain: str, proxy_url: str | None) -> _Entry:
+        # Caller holds self._lock
+        key = ("sync", domain, proxy_url)
+        self._evict_idle()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(
+                httpx.Client(**_client_kwargs(domain, proxy_url)), 0.0,
+            )
+        entry.last_used = time.monotonic()
+        return entry
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            loop_gone = entry.loop is not None and entry.loop.is_closed()
+            idle = not entry.leases and now - entry.last_used > self.idle_expiry
+            if loop_gone or idle:
+                del self._entries[key]
+                _close_entry(entry)
+
+
+def _client_kwargs(domain: str, proxy_url: str | None) -> dict:
+    return {
+        "base_url": f"https://{domain}",
+        "timeout": CLIENT_TIMEOUT,
+        "follow_redirects": True,
+        "proxy": proxy_url,
+        "http2": HTTP2_AVAILABLE,
+        "limits": POOL_LIMITS,
+    }
+
+
+def _close_entry(entry: _Entry) -> None:
+    if entry.loop is None:
+        entry.client.close()
+    elif not entry.loop.is_closed():
+        # Close on the client's own loop; a closed loop already dropped its sockets
+        entry.loop.call_soon_threadsafe(lambda: entry.loop.create_task(entry.client.aclose()))
+
+
+_registry = ClientRegistry()
+
+
+def get_client(domain: str, proxy_url: str | None = None) -> httpx.Client:
+    """Shared sync client for a domain (and optional proxy)."""
+    return _registry.client(domain, proxy_url)
+
+
+def lease_client(domain: str, proxy_url: str | None = None):
+    """Context manager yielding the shared sync client, for callers that stream
+    responses: the client is not evicted while the lease is held."""
+    return _registry.lease(domain, proxy_url)
+
+
+def get_async_client(domain: str, proxy_url: str | None = None) -> httpx.AsyncClient:
+    """Shared async client for a domain on the running event loop."""
+    return _registry.async_client(domain, proxy_url)
+
+
+def client_stats() -> dict:
+    return _registry.stats()
+
+
+def close_all_clients() -> None:
+    _registry.close_all()
+
+
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def run_in_worker_loop(coro):
+    """Run a coroutine on this process's long-lived event loop.
+
+    Unlike asyncio.run, the loop survives between calls, so pooled async
+    clients keep their connections across Celery tasks.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(coro)
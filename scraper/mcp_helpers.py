@@ -1,132 +1,501 @@
-"""Shared helpers for the scraper MCP server — HTML cleaning, fetching, product parsing."""
+"""Shared helpers for the scraper MCP server — HTML parsing, fetching, product parsing."""
 
 from __future__ import annotations
 
 import json as _json
+import logging
 import re
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from functools import cached_property
+from html import unescape
 
 import httpx
 
+from scraper.http_clients import lease_client
+from scraper.transport_memory import (
+    TRANSPORT_BLOCKED,
+    TRANSPORT_CURL_CFFI,
+    TRANSPORT_HTTPX,
+    transport_memory,
+)
+
+logger = logging.getLogger(__name__)
+
 FETCH_PAGE_MAX_CHARS = 15_000
+MAX_RESPONSE_BYTES = 8 * 1024 * 1024  # hard cap on any fetched body
+STRUCTURED_MAX_BYTES = 1024 * 1024  # byte budget when only structured data is wanted
+DETECT_MAX_BYTES = 256 * 1024  # platform markers sit near the top of a homepage
+BOT_BLOCK_STATUSES = (403, 503)  # what bot managers answer a refused client with
+BOT_CHECK_BYTES = 4096  # body read from a 403/503 to look for a challenge page
+_BOT_SERVER_MARKERS = ("cloudflare", "akamai")
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/131.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/json",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+_HEAD_CLOSE_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+_LD_JSON_OPEN_RE = re.compile(rb"<script[^>]*ld\+json[^>]*>", re.IGNORECASE)
+_LD_JSON_BLOCK_RE = re.compile(
+    rb"<script[^>]*ld\+json[^>]*>(.*?)</script", re.IGNORECASE | re.DOTALL,
+)
+_PRODUCT_TYPE_RE = re.compile(rb'"@type"\s*:\s*(?:\[[^\]]*)?"Product"')
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+@dataclass
+class FetchedResponse:
+    """A fetched (possibly partial) page; the same shape whichever transport or
+    cache produced it."""
+
+    url: str
+    status_code: int
+    content: bytes
+    encoding: str = "utf-8"
+    headers: dict[str, str] = field(default_factory=dict)  # lowercased names
+    truncated: bool = False  # reading stopped before the end of the body
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def head_text(self, limit: int = 3000) -> str:
+        """Start of the body as text, without decoding the whole page."""
+        return self.content[:limit * 4].decode(self.encoding, errors="replace")[:limit]
+
+
+# Image URLs containing any of these are icons, pixels or placeholders, not products
+SKIP_IMAGE_KEYWORDS = (
+    "data:image", ".svg", "1x1", "pixel", "spacer", "blank",
+    "icon", "logo", "badge", "flag", "arrow", "spinner",
+)
+PAGE_IMAGE_LIMIT = 30
+LINK_TEXT_MAX_CHARS = 120
+
+# One scan over the document stops only at the markup the page model needs:
+# comments and non-visible elements (skipped whole), <a>/</a>, <img>, and
+# pagination hrefs on any other tag. Every other tag is plain text to the scan.
+_PAGE_TOKEN_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<(script|style|noscript|svg|template)\b([^>]*)>"
+    r"|<(/?)a\b([^>]*)>"
+    r"|<img\b([^>]*)>"
+    r"""|\shref\s*=\s*["']([^"']*(?:[?&]page=\d+|/page/\d+)[^"']*)["']""",
+    re.DOTALL | re.IGNORECASE,
+)
+_ATTR_RE = re.compile(
+    r"""([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?""",
+)
+_PAGINATION_RE = re.compile(r"[?&]page=\d+|/page/\d+", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class PageAnchor:
+    href: str  # resolved against the page URL, fragment removed
+    text: str  # visible link text, cleaned and truncated
+    image: str | None = None  # first product-looking <img> inside the link
+    start: int = 0  # offsets of the link's content in the page
+    end: int = 0
+
+
+@dataclass
+class ParsedPage:
+    """Everything the MCP tools read from one HTML page, built in a single scan."""
+
+    url: str
+    anchors: list[PageAnchor] = field(default_factory=list)
+    images: list[str] = field(default_factory=list)
+    json_ld: list[str] = field(default_factory=list)
+    pagination: list[str] = field(default_factory=list)
+    visible_html: list[str] = field(default_factory=list, repr=False)
+    # (offset, resolved url) of every product-looking <img>, in document order
+    image_positions: list[tuple[int, str]] = field(default_factory=list, repr=False)
+
+    @cached_property
+    def text(self) -> str:
+        """Visible text; computed on first use since crawling never needs it."""
+        return _collapse_text(_TAG_RE.sub(" ", "".join(self.visible_html)))
+
+    def links(self) -> list[dict]:
+        """Same-domain links as [{text, href}], one per href (first non-empty text)."""
+        base_netloc = _netloc(self.url)
+        texts: dict[str, str] = {}
+        for anchor in self.anchors:
+            if texts.get(anchor.href):
+                continue
+            netloc = _netloc(anchor.href)
+            if netloc and netloc != base_netloc:
+                continue
+            texts[anchor.href] = anchor.text
+        return [{"text": text, "href": href} for href, text in texts.items() if text]
+
+    def image_for(self, href: str) -> str:
+        """Product image for a link, or "" — a dict lookup once the index is built.
+
+        Handles the common Japanese e-commerce pattern where the image and text
+        are in sibling <a> tags sharing the same href:
+            <a href="/item/123"><img src="product.jpg"></a>
+            <a href="/item/123">Product Name ¥55,000</a>
+        """
+        return self._image_index.get(_url_path(href), "")
+
+    @cached_property
+    def _image_index(self) -> dict[str, str]:
+        """{url path: image}, built once per page in O(n log n).
+
+        A path takes the first image wrapped by any link to it (query strings
+        and absolute vs relative hrefs are ignored). Paths whose links wrap no
+        image take the nearest image inside their product card: between the
+        neighbouring links that point elsewhere.
+        """
+        anchors = self.anchors
+        paths = [_url_path(anchor.href) for anchor in anchors]
+        index: dict[str, str] = {}
+        for anchor, path in zip(anchors, paths):
+            if anchor.image and path not in index:
+                index[path] = anchor.image
+        if len(index) == len(set(paths)) or not self.image_positions:
+            return index
+
+        # Card bounds: end of the previous / start of the next link elsewhere
+        n = len(anchors)
+        lower = [0] * n
+        upper = [self.image_positions[-1][0] + 1] * n
+        for i in range(1, n):
+            lower[i] = lower[i - 1] if paths[i] == paths[i - 1] else anchors[i - 1].end
+        for i in range(n - 2, -1, -1):
+            upper[i] = upper[i + 1] if paths[i] == paths[i + 1] else anchors[i + 1].start
+
+        offsets = [offset for offset, _ in self.image_positions]
+        for i, (anchor, path) in enumerate(zip(anchors, paths)):
+            if path in index:
+                continue
+            before = bisect_left(offsets, anchor.start) - 1
+            after = bisect_left(offsets, anchor.end)
+            candidates = []
+            if before >= 0 and offsets[before] > lower[i]:
+                candidates.append((anchor.start - offsets[before], before))
+            if after < len(offsets) and offsets[after] < upper[i]:
+                candidates.append((offsets[after] - anchor.end, after))
+            if candidates:
+                index[path] = self.image_positions[min(candidates)[1]][1]
+        return index
+
+    def clean_text(self) -> str:
+        """Visible text with product image URLs kept in an [images] section."""
+        if not self.images:
+            return self.text
+        return self.text + "\n\n[images]\n" + "\n".join(self.images)
+
+
+def _parse_page(html: str, base_url: str) -> ParsedPage:
+    """Scan an HTML page once and collect links, link images, JSON-LD
+    blocks, visible text and pagination hrefs."""
+    from urllib.parse import urldefrag, urljoin
+
+    page = ParsedPage(url=base_url)
+    lower: str | None = None  # built lazily, only to find skipped elements' close tags
+    anchor: PageAnchor | None = None
+    text_from = 0  # start of the visible run since the last skipped element
+    seen_images: set[str] = set()
+    resolved: dict[str, str] = {}  # listings repeat each href for image and title links
+
+    origin = "/".join(base_url.split("/", 3)[:3])  # scheme://host
+
+    def resolve(href: str) -> str:
+        url = resolved.get(href)
+        if url is None:
+            if href.startswith(("http://", "https://")):
+                url = href
+            elif href.startswith("/") and not href.startswith("//") and "/." not in href:
+                url = origin + href  # root-relative, the common case on listings
+            else:
+                url = urljoin(base_url, href)
+            if "#" in url:
+                url = urldefrag(url)[0]
+            resolved[href] = url
+        return url
+
+    def close_anchor(end: int) -> None:
+        if anchor is not None:
+            anchor.end = end
+            text = _TAG_RE.sub(" ", html[anchor.start:end])
+            anchor.text = _collapse_text(text)[:LINK_TEXT_MAX_CHARS]
+
+    pos = 0
+    length = len(html)
+    while (match := _PAGE_TOKEN_RE.search(html, pos)) is not None:
+        skipped = match.group(1)
+        if skipped or match.group(0).startswith("<!--"):
+            page.visible_html.append(html[text_from:match.start()])
+            pos = match.end()
+            if skipped:
+                skipped = skipped.lower()
+                if lower is None:
+                    lower = html.lower()
+                close_at = lower.find(f"</{skipped}", pos)
+                content_end = close_at if close_at != -1 else length
+                if skipped == "script" and "ld+json" in match.group(2).lower():
+                    page.json_ld.append(html[pos:content_end])
+                after = html.find(">", content_end)
+                pos = after + 1 if after != -1 else length
+            text_from = pos
+            continue
 
+        if match.group(4) is not None:  # <a ...> or </a>
+            close_anchor(match.start())
+            anchor = None
+            if not match.group(3):
+                href = _tag_attrs(match.group(4)).get("href", "").strip()
+                if href and not href.startswith(("#", "javascript:", "mailto:", "tel:")):
+                    anchor = PageAnchor(href=resolve(href), text="", start=match.end())
+                    page.anchors.append(anchor)
+                if _PAGINATION_RE.search(href):
+                    page.pagination.append(resolve(href))
+        elif match.group(5) is not None:  # <img ...>
+            src = _image_src(_tag_attrs(match.group(5)))
+            if src and not any(kw in src.lower() for kw in SKIP_IMAGE_KEYWORDS):
+                if src.startswith("//"):
+                    src = "https:" + src
+                absolute = src if src.startswith("http") else resolve(src)
+                page.image_positions.append((match.start(), absolute))
+                if anchor is not None and anchor.image is None:
+                    anchor.image = absolute
+                if len(page.images) < PAGE_IMAGE_LIMIT and src not in seen_images:
+                    seen_images.add(src)
+                    page.images.append(src)
+        else:  # pagination href on a non-anchor tag, e.g. <link rel="next">
+            page.pagination.append(resolve(unescape(match.group(6))))
+        pos = match.end()
+
+    close_anchor(length)
+    page.visible_html.append(html[text_from:])
+    return page
+
+
+def _tag_attrs(raw_attrs: str) -> dict[str, str]:
+    """Parse a tag's attribute string; names lowercased, values entity-decoded."""
+    attrs: dict[str, str] = {}
+    for name, dq, sq, bare in _ATTR_RE.findall(raw_attrs):
+        name = name.lower()
+        if name not in attrs:
+            value = dq or sq or bare
+            attrs[name] = unescape(value) if "&" in value else value
+    return attrs
+
+
+def _image_src(attrs: dict[str, str]) -> str:
+    """Real image URL of an <img>, preferring lazy-load attributes over placeholders."""
+    src = attrs.get("src", "").strip()
+    if not src or src.startswith("data:"):
+        src = (attrs.get("data-src") or attrs.get("data-original") or src).strip()
+    return src
+
+
+def _charset(content_type: str, body: bytes) -> str:
+    """Body encoding from the Content-Type charset, else a <meta charset> near
+    the top (common on Shift_JIS retailer pages), else UTF-8."""
+    import codecs
+
+    candidates = []
+    if "charset=" in content_type:
+        candidates.append(content_type.split("charset=", 1)[1].split(";")[0].strip(" \"'"))
+    meta = _META_CHARSET_RE.search(body[:4096])
+    if meta:
+        candidates.append(meta.group(1).decode("ascii", errors="ignore"))
+    for name in candidates:
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            continue
+    return "utf-8"
 
-def _extract_links(html: str, base_url: str) -> list[dict]:
-    """Extract <a href> links from HTML, resolved against base_url.
-    Returns [{text, href}] — deduped, skipping anchors/js/mailto."""
-    from urllib.parse import urljoin, urlparse
 
-    base_parsed = urlparse(base_url)
-    raw = re.findall(r'<a[^>]+href=["\']([^"\'#]+)["\'][^>]*>(.*?)</a>', html, re.DOTALL | re.IGNORECASE)
+def _netloc(url: str) -> str:
+    """Host part of an absolute URL; cheaper than urlparse for resolved hrefs."""
+    if "://" not in url:
+        return ""
+    return url.split("/", 3)[2]
 
-    seen: set[str] = set()
-    links: list[dict] = []
-    for href, text in raw:
-        if href.startswith(("javascript:", "mailto:", "tel:")):
-            continue
-        resolved = urljoin(base_url, href)
-        parsed = urlparse(resolved)
-        # Only same-domain links
-        if parsed.netloc and parsed.netloc != base_parsed.netloc:
-            continue
-        if resolved in seen:
-            continue
-        seen.add(resolved)
-        # Clean link text: replace tags with spaces (preserves word boundaries),
-        # then decode HTML entities
-        clean_text = re.sub(r"<[^>]+>", " ", text).strip()
-        clean_text = clean_text.replace("&yen;", "¥").replace("&amp;", "&")
-        clean_text = clean_text.replace("&lt;", "<").replace("&gt;", ">")
-        clean_text = clean_text.replace("&nbsp;", " ").replace("&#39;", "'")
-        clean_text = re.sub(r"\s+", " ", clean_text)[:120]
-        if clean_text:
-            links.append({"text": clean_text, "href": resolved})
-    return links
-
-
-def _extract_image_urls(html: str, limit: int = 30) -> list[str]:
-    """Extract product image URLs from <img> tags before HTML is stripped."""
-    # Match src attributes on img tags
-    imgs = re.findall(
-        r'<img[^>]+src=["\']([^"\']+)["\']',
-        html, re.IGNORECASE,
-    )
-    seen: set[str] = set()
-    result: list[str] = []
-    for url in imgs:
-        # Skip tiny icons, tracking pixels, SVGs, base64
-        if any(skip in url.lower() for skip in (
-            "data:image", ".svg", "1x1", "pixel", "spacer", "blank",
-            "icon", "logo", "badge", "flag", "arrow", "spinner",
-        )):
-            continue
-        # Normalize protocol-relative URLs
-        if url.startswith("//"):
-            url = "https:" + url
-        if url not in seen:
-            seen.add(url)
-            result.append(url)
-        if len(result) >= limit:
-            break
-    return result
-
-
-def _clean_html(html: str) -> str:
-    """Strip scripts, styles, tags, and collapse whitespace from HTML.
-    Preserves product image URLs in a [images] section at the end."""
-    # Extract images before stripping tags
-    images = _extract_image_urls(html)
-
-    html = re.sub(r"<script[^>]*>.*?</script>", "", html, flags=re.DOTALL | re.IGNORECASE)
-    html = re.sub(r"<style[^>]*>.*?</style>", "", html, flags=re.DOTALL | re.IGNORECASE)
-    html = re.sub(r"<noscript[^>]*>.*?</noscript>", "", html, flags=re.DOTALL | re.IGNORECASE)
-    html = re.sub(r"<!--.*?-->", "", html, flags=re.DOTALL)
-    html = re.sub(r"<svg[^>]*>.*?</svg>", "", html, flags=re.DOTALL | re.IGNORECASE)
-    html = re.sub(r"<[^>]+>", " ", html)
-    html = html.replace("&amp;", "&").replace("&lt;", "<").replace("&gt;", ">")
-    html = html.replace("&nbsp;", " ").replace("&#39;", "'").replace("&quot;", '"')
-    html = re.sub(r"\s+", " ", html).strip()
-
-    if images:
-        html += "\n\n[images]\n" + "\n".join(images)
-
-    return html
-
-
-def _fetch_with_fallback(url: str):
-    """Fetch a URL with httpx, fall back to curl_cffi for bot-protected sites."""
-    _headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/131.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/json",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-    try:
-        with httpx.Client(
-            timeout=15.0, follow_redirects=True, headers=_headers,
-        ) as client:
-            resp = client.get(url)
-            resp.raise_for_status()
-            if _is_bot_challenge(resp.text):
+
+def _url_path(url: str) -> str:
+    """Path of a resolved URL without query or fragment."""
+    rest = url.split("://", 1)[-1]
+    slash = rest.find("/")
+    path = rest[slash:] if slash != -1 else "/"
+    return path.split("?", 1)[0].split("#", 1)[0]
+
+
+def _collapse_text(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", unescape(text)).strip()
+
+
+def _fetch_with_fallback(
+    url: str,
+    headers: dict[str, str] | None = None,
+    max_bytes: int = MAX_RESPONSE_BYTES,
+    stop_when: Callable[[bytearray], bool] | None = None,
+) -> FetchedResponse:
+    """Fetch a URL with the pooled httpx client, fall back to curl_cffi for
+    bot-protected sites. Extra headers (e.g. conditional-request validators)
+    are sent with either transport.
+
+    The body is streamed and reading stops at max_bytes, or as soon as
+    stop_when(body_so_far) is true (see StructuredDataReady); either way the
+    result is marked truncated.
+
+    A 304 reply to a conditional request is returned as is, with an empty
+    body, and does not change the remembered transport.
+
+    The transport that worked is remembered per domain: domains known to need
+    curl_cffi skip the httpx attempt, and domains known to be blocked fail fast
+    until their profile expires. curl_cffi is only remembered when httpx met
+    bot protection; a transient httpx failure (timeout, 5xx, reset) falls back
+    for this request alone.
+    """
+    from urllib.parse import urlparse
+
+    domain = urlparse(url).netloc
+    transport = transport_memory.get(domain)
+    if transport == TRANSPORT_BLOCKED:
+        raise httpx.HTTPError(
+            f"{domain} is bot-protected (remembered); try scrape_sitemap"
+        )
+
+    bot_protected = transport == TRANSPORT_CURL_CFFI
+    if not bot_protected:
+        try:
+            with lease_client(domain) as client, client.stream(
+                "GET", url, headers={**BROWSER_HEADERS, **(headers or {})}, timeout=15.0,
+            ) as resp:
+                if resp.status_code == 304:
+                    # Reply to a conditional request: the caller holds the body
+                    return _read_body(resp, (), max_bytes, None)
+                if resp.status_code in BOT_BLOCK_STATUSES:
+                    bot_protected = _looks_bot_protected(
+                        _read_body(resp, resp.iter_bytes(), BOT_CHECK_BYTES, None)
+                    )
+                resp.raise_for_status()
+                page = _read_body(resp, resp.iter_bytes(), max_bytes, stop_when)
+            if _is_bot_challenge(page.head_text()):
+                bot_protected = True
                 raise httpx.HTTPError("Bot challenge detected, falling back")
-            return resp
-    except (httpx.HTTPError, httpx.TimeoutException):
-        pass
+            transport_memory.remember(domain, TRANSPORT_HTTPX)
+            return page
+        except (httpx.HTTPError, httpx.TimeoutException) as exc:
+            logger.debug("httpx failed for %s (%s), trying curl_cffi", url, exc)
 
     try:
         from curl_cffi import requests as cffi_requests
-        resp = cffi_requests.get(url, impersonate="chrome", timeout=15)
-        if resp.status_code >= 400:
-            resp.raise_for_status()
-        if _is_bot_challenge(resp.text):
+        resp = cffi_requests.get(
+            url, impersonate="chrome", timeout=15, headers=headers, stream=True,
+        )
+        try:
+            if resp.status_code == 304:
+                return _read_body(resp, (), max_bytes, None)
+            if resp.status_code >= 400:
+                resp.raise_for_status()
+            page = _read_body(resp, resp.iter_content(), max_bytes, stop_when)
+        finally:
+            resp.close()
+        if _is_bot_challenge(page.head_text()):
+            transport_memory.remember(domain, TRANSPORT_BLOCKED)
             raise Exception(f"Bot challenge not bypassable for {url}")
-        return resp
+        if bot_protected:
+            transport_memory.remember(domain, TRANSPORT_CURL_CFFI)
+        return page
     except ImportError:
         raise httpx.HTTPError(
             f"httpx blocked by bot protection and curl_cffi not installed for {url}"
         )
 
 
+def _read_body(
+    resp,
+    chunks: Iterable[bytes],
+    max_bytes: int,
+    stop_when: Callable[[bytearray], bool] | None,
+) -> FetchedResponse:
+    """Read a streamed response into a FetchedResponse, stopping early when allowed."""
+    body = bytearray()
+    truncated = False
+    for chunk in chunks:
+        body += chunk
+        if len(body) >= max_bytes:
+            del body[max_bytes:]
+            truncated = True
+            break
+        if stop_when is not None and stop_when(body):
+            truncated = True
+            break
+    if truncated:
+        logger.debug("Stopped reading %s after %d bytes", resp.url, len(body))
+
+    headers = {name.lower(): value for name, value in resp.headers.items()}
+    return FetchedResponse(
+        url=str(resp.url),
+        status_code=resp.status_code,
+        content=bytes(body),
+        encoding=_charset(headers.get("content-type", ""), body),
+        headers=headers,
+        truncated=truncated,
+    )
+
+
+class StructuredDataReady:
+    """stop_when condition for detail pages: true once </head> has arrived and a
+    complete JSON-LD block describing a Product has been read.
+
+    Scans only the bytes added since the previous call (plus a small overlap
+    for markers split across chunks), so checking every chunk stays linear.
+    """
+
+    _OVERLAP = 32
+
+    def __init__(self) -> None:
+        self.head_closed = False
+        self.has_product = False
+        self._head_from = 0
+        self._ld_from = 0
+
+    def __call__(self, body: bytearray) -> bool:
+        if not self.head_closed:
+            self.head_closed = _HEAD_CLOSE_RE.search(body, self._head_from) is not None
+            self._head_from = max(len(body) - self._OVERLAP, 0)
+
+        if not self.has_product:
+            resume = self._ld_from
+            for match in _LD_JSON_BLOCK_RE.finditer(body, resume):
+                if _PRODUCT_TYPE_RE.search(match.group(1)):
+                    self.has_product = True
+                    break
+                resume = match.end()
+            else:
+                # Restart at an unclosed block if one is open, else near the end
+                unclosed = _LD_JSON_OPEN_RE.search(body, resume)
+                self._ld_from = (
+                    unclosed.start() if unclosed else max(len(body) - self._OVERLAP, resume)
+                )
+        return self.head_closed and self.has_product
+
+
+def _looks_bot_protected(page: FetchedResponse) -> bool:
+    """Whether a 403/503 reply came from a bot manager rather than the site itself."""
+    if _is_bot_challenge(page.head_text()) or page.headers.get("cf-mitigated") == "challenge":
+        return True
+    server = page.headers.get("server", "").lower()
+    return page.status_code == 403 and any(m in server for m in _BOT_SERVER_MARKERS)
+
+
 def _is_bot_challenge(html: str) -> bool:
     """Detect common bot challenge pages (Akamai, Cloudflare, etc.)."""
     markers = [
@@ -179,51 +548,26 @@ def _extract_jsonld_products(json_ld_blocks: list[str]) -> str | None:
     return _products_to_csv(products, ["name", "id", "price", "in_stock", "url"])
 
 
-def _build_href_image_map(html: str, base_url: str) -> dict[str, str]:
-    """Scan all <a> tags containing <img> tags and build {resolved_href: image_url}.
-
-    Handles the common Japanese e-commerce pattern where the image and text
-    are in sibling <a> tags sharing the same href:
-        <a href="/item/123"><img src="product.jpg"></a>
-        <a href="/item/123">Product Name ¥55,000</a>
-    """
-    from urllib.parse import urljoin
-
-    # Match <a href="...">...<img ...src="...">...</a> (image inside link)
-    pattern = re.compile(
-        r'<a[^>]+href=["\']([^"\'#]+)["\'][^>]*>'
-        r'(?:(?!</a>).)*?'
-        r'<img[^>]+src=["\']([^"\']+)["\']'
-        r'(?:(?!</a>).)*?'
-        r'</a>',
-        re.DOTALL | re.IGNORECASE,
-    )
-
-    skip_keywords = (
-        "data:image", ".svg", "1x1", "pixel", "spacer", "blank",
-        "icon", "logo", "badge", "flag", "arrow", "spinner",
-    )
-
-    href_map: dict[str, str] = {}
-    for href, img_src in pattern.findall(html):
-        if href.startswith(("javascript:", "mailto:", "tel:")):
-            continue
-        img_lower = img_src.lower()
-        if any(kw in img_lower for kw in skip_keywords):
-            continue
-
-        resolved_href = urljoin(base_url, href)
-        if resolved_href in href_map:
-            continue  # keep first image per href
-
-        if img_src.startswith("//"):
-            img_src = "https:" + img_src
-        elif not img_src.startswith("http"):
-            img_src = urljoin(base_url, img_src)
+def _compact_raw_product(p) -> dict:
+    """Reduce a RawProduct to the compact row returned by the store-scraping tools."""
+    return {
+        "name": p.name,
+        "sku": p.sku or "",
+        "price_usd": str(p.price_usd) if p.price_usd else "",
+        "material": p.material or "",
+        "sizes": p.sizes,
+        "in_stock": p.in_stock,
+    }
 
-        href_map[resolved_href] = img_src
 
-    return href_map
+def _result_row(p) -> dict:
+    """A RawProduct as stored behind a result handle: the compact row plus what
+    save_items needs to persist it (ids, links, image)."""
+    row = _compact_raw_product(p)
+    row["external_id"] = p.external_id or ""
+    row["image_url"] = p.primary_image_url or ""
+    row["product_url"] = p.source_url or ""
+    return row
 
 
 def _products_to_csv(products: list[dict], fields: list[str]) -> str:
@@ -5,18 +5,26 @@ from __future__ import annotations
 import re
 
 from mcp.server.fastmcp import FastMCP
+from tokyoradar_shared.config import settings
+from tokyoradar_shared.results import ResultWriter, select_results
 
 from scraper.mcp_helpers import (
+    DETECT_MAX_BYTES,
     FETCH_PAGE_MAX_CHARS,
-    _build_href_image_map,
-    _clean_html,
-    _extract_image_urls,
+    STRUCTURED_MAX_BYTES,
+    StructuredDataReady,
     _extract_jsonld_products,
-    _extract_links,
     _fetch_with_fallback,
     _is_bot_challenge,
+    _parse_page,
     _products_to_csv,
+    _result_row,
 )
+from scraper.crawler import CrawlEngine, fingerprint
+from scraper.http_clients import get_client
+from scraper.page_cache import page_cache
+from scraper.sitemaps import SitemapEngine, brand_matcher, sitemap_cursors
+from scraper.tool_pool import tool_pool
 from scraper.sources.registry import (
     SCRAPER_REGISTRY,
     get_scraper,
@@ -24,11 +32,25 @@ from scraper.sources.registry import (
 )
 
 from mcp.server.fastmcp.server import TransportSecuritySettings
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+CRAWL_CSV_FIELDS = ["name", "price", "currency", "image_url", "product_url", "in_stock"]
+STORE_CSV_FIELDS = ["name", "sku", "price_usd", "material", "sizes", "in_stock"]
+SITEMAP_CSV_FIELDS = ["name", "url", "lastmod"]
+READ_RESULTS_MAX_ROWS = 500
+HANDLE_NOTE = (
+    "products_csv is a sample of {shown} of {count} rows. To save them, pass "
+    "result_handle='{handle}' to save_items / save_price_listings; do not copy rows. "
+    "read_results(result_handle, offset) shows more if you need to inspect them."
+)
 
 mcp = FastMCP(
     "TokyoRadar Scraper",
     host="0.0.0.0",
     port=8001,
+    # Sessions live in one process; several processes must serve stateless requests
+    stateless_http=settings.SCRAPER_MCP_WORKERS > 1,
     transport_security=TransportSecuritySettings(
         enable_dns_rebinding_protection=False,
     ),
@@ -36,59 +58,54 @@ mcp = FastMCP(
 
 
 @mcp.tool()
-def scrape_shopify_store(domain: str) -> dict:
+@tool_pool.limited
+async def scrape_shopify_store(domain: str) -> dict:
     """Scrape products from a Shopify store via products.json API.
-    ONLY for scraper_type='shopify' stores. Returns compact CSV: name|sku|price|material|sizes|in_stock.
+    ONLY for scraper_type='shopify' stores. Stores all products server-side and returns
+    count, a sample CSV (name|sku|price_usd|material|sizes|in_stock) and a result_handle
+    to pass to save_items / save_price_listings.
     Do NOT use for non-Shopify sites — use fetch_page instead."""
     from scraper.sources.shopify import ShopifyBrandScraper
 
-    with ShopifyBrandScraper(domain=domain) as scraper:
-        products = scraper.scrape_products()
-
-    compact = [
-        {
-            "name": p.name,
-            "sku": p.sku or "",
-            "price_usd": str(p.price_usd) if p.price_usd else "",
-            "material": p.material or "",
-            "sizes": p.sizes,
-            "in_stock": p.in_stock,
-        }
-        for p in products
-    ]
-
-    csv_data = _products_to_csv(
-        compact, ["name", "sku", "price_usd", "material", "sizes", "in_stock"]
-    )
+    # Reduce each product to its stored row as it streams in (drops raw_data early)
+    with ResultWriter("shopify") as results:
+        async with ShopifyBrandScraper(domain=domain) as scraper:
+            async for p in scraper.ascrape_products():
+                results.write(_result_row(p))
 
     return {
         "domain": domain,
-        "count": len(products),
-        "products_csv": csv_data,
+        **_handle_summary(results, STORE_CSV_FIELDS),
     }
 
 
 @mcp.tool()
-def fetch_page(url: str) -> dict:
+@tool_pool.limited
+def fetch_page(url: str, structured_only: bool = False) -> dict:
     """Fetch a single URL and return cleaned text + product data + discovered links.
     For broad product scraping across multiple pages, prefer crawl_products instead.
-    Returns max 15K chars of cleaned text, plus a [links] section with same-domain hrefs."""
+    Returns max 15K chars of cleaned text, plus a [links] section with same-domain hrefs.
+    For product detail pages set structured_only=True: the download stops once the
+    page head and its JSON-LD product data have arrived (much faster on big pages)."""
     try:
-        resp = _fetch_with_fallback(url)
+        if structured_only:
+            resp = page_cache.fetch(
+                url, tool="fetch_page",
+                max_bytes=STRUCTURED_MAX_BYTES, stop_when=StructuredDataReady(),
+            )
+        else:
+            resp = page_cache.fetch(url, tool="fetch_page")
 
         content_type = resp.headers.get("content-type", "")
         raw_body = resp.text
 
         if "html" in content_type:
-            json_ld_blocks = re.findall(
-                r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
-                raw_body, re.DOTALL | re.IGNORECASE,
-            )
-            products_csv = _extract_jsonld_products(json_ld_blocks)
-            cleaned = _clean_html(raw_body)
+            page = _parse_page(raw_body, url)
+            products_csv = _extract_jsonld_products(page.json_ld)
+            cleaned = page.clean_text()
 
             # Extract navigation links for agent to discover sub-pages
-            links = _extract_links(raw_body, url)
+            links = page.links()
             # Filter to likely product/category links, limit to 30
             interesting_links = [
                 lk for lk in links
@@ -112,119 +129,93 @@ def fetch_page(url: str) -> dict:
 
         body = body[:FETCH_PAGE_MAX_CHARS]
 
-        return {
+        result = {
             "url": url,
             "status": resp.status_code,
             "body": body,
         }
+        if resp.truncated:
+            result["truncated"] = True
+        return result
     except Exception as exc:
         return {"url": url, "error": str(exc)}
 
 
 @mcp.tool()
-def scrape_sitemap(domain: str, brand_name: str) -> dict:
+@tool_pool.limited
+async def scrape_sitemap(domain: str, brand_name: str, only_new: bool = False) -> dict:
     """Scrape a website's XML sitemap to find product URLs for a brand.
     Use for bot-protected sites (Akamai, Cloudflare) where fetch_page fails.
-    Sitemaps bypass bot detection. Returns product URLs matching the brand name."""
-    try:
-        from curl_cffi import requests as cffi_requests
-    except ImportError:
-        return {"error": "curl_cffi not installed"}
-
-    brand_lower = brand_name.lower()
-    product_urls: list[str] = []
-
-    try:
-        r = cffi_requests.get(
-            f"https://{domain}/sitemap.xml",
-            impersonate="chrome", timeout=15,
-        )
-        if r.status_code != 200:
-            return {"error": f"Sitemap returned {r.status_code}"}
-    except Exception as exc:
-        return {"error": f"Failed to fetch sitemap: {exc}"}
-
-    sub_sitemaps = re.findall(r"<loc>(.*?)</loc>", r.text)
-
-    if "<sitemapindex" in r.text:
-        for sm_url in sub_sitemaps:
-            try:
-                sr = cffi_requests.get(sm_url, impersonate="chrome", timeout=15)
-                if sr.status_code != 200:
-                    continue
-                urls = re.findall(r"<loc>(.*?)</loc>", sr.text)
-                matches = [u for u in urls if brand_lower in u.lower()]
-                product_urls.extend(matches)
-            except Exception:
-                continue
-    else:
-        product_urls = [u for u in sub_sitemaps if brand_lower in u.lower()]
-
-    products = []
-    for url in product_urls:
-        parts = url.rstrip("/").split("/")
-        name = parts[-2] if len(parts) >= 2 else parts[-1]
-        name = name.replace("-", " ").title()
-        products.append({"name": name, "url": url})
-
-    csv_data = _products_to_csv(products, ["name", "url"]) if products else ""
+    Sitemaps bypass bot detection. Stores the product URLs matching the brand name
+    server-side and returns count, a sample CSV (name|url|lastmod) and a result_handle.
+    only_new=True returns only URLs modified since the last scrape_sitemap run
+    for this domain and brand (by sitemap <lastmod>). The cursor only advances
+    when every sitemap was read."""
+    since = sitemap_cursors.get(domain, brand_name) if only_new else None
+    engine = SitemapEngine(keep=brand_matcher(brand_name), since=since)
+    result = await engine.run(f"https://{domain}/sitemap.xml")
+
+    if not result.sitemaps_fetched:
+        return {"error": f"Failed to fetch sitemap: {'; '.join(result.errors)}"}
+    if result.high_water_mark:
+        sitemap_cursors.advance(domain, brand_name, result.high_water_mark)
+
+    with ResultWriter("sitemap") as results:
+        for entry in result.urls:
+            parts = entry.loc.rstrip("/").split("/")
+            name = parts[-2] if len(parts) >= 2 else parts[-1]
+            name = name.replace("-", " ").title()
+            results.write({
+                "name": name,
+                "url": entry.loc,
+                "lastmod": entry.lastmod.date().isoformat() if entry.lastmod else "",
+            })
 
     return {
         "domain": domain,
         "brand": brand_name,
-        "count": len(product_urls),
-        "products_csv": csv_data,
+        "since": since.isoformat() if since else None,
+        "sitemaps_fetched": result.sitemaps_fetched,
+        **_handle_summary(results, SITEMAP_CSV_FIELDS),
+        "errors": result.errors or None,
     }
 
 
 @mcp.tool()
-def scrape_brand(brand_slug: str) -> dict:
+@tool_pool.limited
+async def scrape_brand(brand_slug: str) -> dict:
     """High-level: scrape a brand using its registered scraper config.
     Looks up the brand in the scraper registry, runs the appropriate scraper,
-    and returns product data as compact CSV."""
+    stores the products server-side and returns count, a sample CSV and a result_handle."""
     config = SCRAPER_REGISTRY.get(brand_slug)
     if not config:
         return {"error": f"Brand '{brand_slug}' not in scraper registry"}
 
     try:
-        scraper = get_scraper(brand_slug)
-        with scraper:
-            products = scraper.scrape_products()
-
-        compact = [
-            {
-                "name": p.name,
-                "sku": p.sku or "",
-                "price_usd": str(p.price_usd) if p.price_usd else "",
-                "material": p.material or "",
-                "sizes": p.sizes,
-                "in_stock": p.in_stock,
-            }
-            for p in products
-        ]
-
-        csv_data = _products_to_csv(
-            compact, ["name", "sku", "price_usd", "material", "sizes", "in_stock"]
-        )
+        with ResultWriter("brand") as results:
+            async with get_scraper(brand_slug) as scraper:
+                async for p in scraper.ascrape_products():
+                    results.write(_result_row(p))
 
         return {
             "brand_slug": brand_slug,
             "source": config.source,
-            "count": len(products),
-            "products_csv": csv_data,
+            **_handle_summary(results, STORE_CSV_FIELDS),
         }
     except Exception as exc:
         return {"brand_slug": brand_slug, "error": str(exc)}
 
 
 @mcp.tool()
+@tool_pool.limited
 def list_scraper_brands() -> dict:
     """List all brands supported by the scraper registry."""
     return {"brands": list_supported_brands()}
 
 
 @mcp.tool()
-def crawl_products(
+@tool_pool.limited
+async def crawl_products(
     start_url: str,
     max_pages: int = 8,
 ) -> dict:
@@ -232,15 +223,14 @@ def crawl_products(
     links to collect ALL products across multiple pages. Much more thorough than
     a single fetch_page call. Use for official stores or large retailer brand pages.
 
-    Returns compact CSV: name|price|currency|image_url|product_url|in_stock.
+    All products are stored server-side. Returns products_found, a sample CSV
+    (name|price|currency|image_url|product_url|in_stock) and a result_handle: pass the
+    handle to save_items / save_price_listings instead of copying rows.
     Automatically extracts products from JSON-LD, og:product, and link+price patterns."""
     from urllib.parse import urljoin, urlparse
 
-    all_products: list[dict] = []
-    visited: set[str] = set()
-    queue: list[str] = [start_url]
-    pages_fetched = 0
-    errors: list[str] = []
+    # Products go to the shared result store as they are found; only a preview stays in memory
+    spool = ResultWriter("crawl")
 
     base_parsed = urlparse(start_url)
     base_domain = base_parsed.netloc
@@ -263,8 +253,9 @@ def crawl_products(
         r'[¥￥]\s*([\d,]+)|[\$]\s*([\d,.]+)',
     )
 
-    seen_names: set[str] = set()
-    seen_urls: set[str] = set()  # deduplicate by URL path (ignoring query params)
+    # Fingerprints of lowercased names and of URL paths (ignoring query params)
+    seen_names: set[int] = set()
+    seen_urls: set[int] = set()
 
     # Extract locale prefix from start_url (e.g. /en-us from SSENSE)
     _locale_match = re.match(r'^(/[a-z]{2}-[a-z]{2})/', urlparse(start_url).path)
@@ -282,42 +273,27 @@ def crawl_products(
             product_url = product_url.replace(parsed.path, _locale_prefix + parsed.path, 1)
         return product_url
 
-    while queue and pages_fetched < max_pages:
-        url = queue.pop(0)
-        if url in visited:
-            continue
-        visited.add(url)
-
-        try:
-            resp = _fetch_with_fallback(url)
-        except Exception as exc:
-            errors.append(f"{url}: {exc}")
-            continue
-        pages_fetched += 1
-
-        # Track redirect domain
-        final_url = str(resp.url) if hasattr(resp, "url") else url
-        final_domain = urlparse(final_url).netloc
+    def _handle_page(url: str, resp) -> list[str]:
+        """Extract products from one fetched page; return listing/pagination
+        links to crawl next (the engine's frontier dedups them)."""
+        next_urls: list[str] = []
+
+        # Track redirect domain (url is already the final URL)
+        final_domain = urlparse(url).netloc
         if final_domain:
             allowed_domains.add(final_domain)
-            # Re-resolve links against final URL
-            url = final_url
 
         raw_html = resp.text
         content_type = resp.headers.get("content-type", "") if hasattr(resp.headers, "get") else ""
 
         if "html" not in content_type and "html" not in raw_html[:200].lower():
-            continue
+            return next_urls
 
-        # Pre-build href→image map for this page
-        href_image_map = _build_href_image_map(raw_html, url)
+        # One parse for links, link images, JSON-LD and pagination
+        page = _parse_page(raw_html, url)
 
         # 1) Extract JSON-LD products
-        json_ld_blocks = re.findall(
-            r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
-            raw_html, re.DOTALL | re.IGNORECASE,
-        )
-        for block in json_ld_blocks:
+        for block in page.json_ld:
             try:
                 data = __import__("json").loads(block)
             except (ValueError, TypeError):
@@ -337,9 +313,10 @@ def crawl_products(
 
             for item in items:
                 name = item.get("name", "").strip()
-                if not name or name.lower() in seen_names:
+                name_key = fingerprint(name.lower())
+                if not name or name_key in seen_names:
                     continue
-                seen_names.add(name.lower())
+                seen_names.add(name_key)
 
                 offers = item.get("offers", {})
                 if isinstance(offers, list):
@@ -361,7 +338,7 @@ def crawl_products(
                 elif isinstance(img_field, dict):
                     image = img_field.get("url", "")
 
-                all_products.append({
+                spool.write({
                     "name": name,
                     "price": price,
                     "currency": currency,
@@ -372,7 +349,7 @@ def crawl_products(
 
         # 2) Extract products from HTML links (name + price in link text)
         #    Common on Japanese e-commerce: <a href="/item/123.html">BRAND NAME ¥55,000</a>
-        links = _extract_links(raw_html, url)
+        links = page.links()
         for link in links:
             href = link["href"]
             text = link["text"]
@@ -382,10 +359,10 @@ def crawl_products(
             if not price_match:
                 continue
             # Deduplicate by URL path (ignore ?cid= etc.)
-            url_path = urlparse(href).path
-            if url_path in seen_urls:
+            url_key = fingerprint(urlparse(href).path)
+            if url_key in seen_urls:
                 continue
-            seen_urls.add(url_path)
+            seen_urls.add(url_key)
             # Extract name (everything before the price symbol)
             name_part = re.split(r'[¥￥$]', text)[0].strip()
             # Strip common status prefixes
@@ -393,9 +370,10 @@ def crawl_products(
                 r'^(SOLD\s*OUT|RESTOCK|NEW|PRE\s*ORDER|COMING\s*SOON)\s*',
                 '', name_part, flags=re.IGNORECASE,
             ).strip()
-            if not name_part or len(name_part) < 3 or name_part.lower() in seen_names:
+            name_key = fingerprint(name_part.lower())
+            if not name_part or len(name_part) < 3 or name_key in seen_names:
                 continue
-            seen_names.add(name_part.lower())
+            seen_names.add(name_key)
 
             jpy_str = price_match.group(1)
             usd_str = price_match.group(2)
@@ -408,27 +386,10 @@ def crawl_products(
                 price_val = usd_str.replace(",", "")
                 currency = "USD"
 
-            # Find product image: primary from pre-built map, fallback by href path
-            img_url = href_image_map.get(href, "")
-            if not img_url:
-                # Fallback: search raw HTML by href path (handles relative vs absolute mismatch)
-                href_path = urlparse(href).path
-                if href_path:
-                    fallback_pattern = re.compile(
-                        re.escape(href_path) + r'["\'][^>]*>'
-                        r'(?:(?!</a>).)*?'
-                        r'<img[^>]+src=["\']([^"\']+)["\']',
-                        re.DOTALL | re.IGNORECASE,
-                    )
-                    fb_match = fallback_pattern.search(raw_html)
-                    if fb_match:
-                        img_url = fb_match.group(1)
-                        if img_url.startswith("//"):
-                            img_url = "https:" + img_url
-                        elif not img_url.startswith("http"):
-                            img_url = urljoin(url, img_url)
-
-            all_products.append({
+            # Find product image: wrapped by a link to this path, else nearest in its card
+            img_url = page.image_for(href)
+
+            spool.write({
                 "name": name_part,
                 "price": price_val,
                 "currency": currency,
@@ -440,70 +401,117 @@ def crawl_products(
         # 3) Discover more listing links to crawl
         for link in links:
             href = link["href"]
-            if href in visited:
-                continue
             link_parsed = urlparse(href)
             # Must be same domain (allow both www and non-www)
             if link_parsed.netloc and link_parsed.netloc not in allowed_domains:
                 continue
             # Queue listing/category pages (not individual product pages)
             if listing_patterns.search(href):
-                queue.append(href)
+                next_urls.append(href)
 
-        # 3) Find pagination: ?page=N or /page/N patterns
-        page_links = re.findall(
-            r'href=["\']([^"\']*(?:[?&]page=\d+|/page/\d+)[^"\']*)["\']',
-            raw_html, re.IGNORECASE,
-        )
-        for pl in page_links:
-            resolved = urljoin(url, pl)
-            if resolved not in visited:
-                queue.append(resolved)
+        # 3) Follow pagination: ?page=N or /page/N hrefs (including <link rel="next">)
+        next_urls.extend(page.pagination)
+
+        return next_urls
 
-    # Build CSV
-    fields = ["name", "price", "currency", "image_url", "product_url", "in_stock"]
-    csv_data = _products_to_csv(all_products, fields) if all_products else ""
+    def _fetch(page_url: str):
+        return page_cache.fetch(page_url, tool="crawl_products")
 
+    with spool:
+        stats = await CrawlEngine(max_pages=max_pages, fetch=_fetch).run(start_url, _handle_page)
+
+    summary = _handle_summary(spool, CRAWL_CSV_FIELDS)
+    summary["products_found"] = summary.pop("count")
     return {
         "start_url": start_url,
-        "pages_fetched": pages_fetched,
-        "products_found": len(all_products),
-        "products_csv": csv_data,
-        "errors": errors if errors else None,
+        "pages_fetched": stats.pages_fetched,
+        **summary,
+        "errors": stats.errors if stats.errors else None,
     }
 
 
 @mcp.tool()
+@tool_pool.limited
+def read_results(
+    result_handle: str,
+    offset: int = 0,
+    limit: int = 200,
+    name_query: str | None = None,
+) -> dict:
+    """Page through the rows stored behind a result_handle (from crawl_products,
+    scrape_shopify_store, scrape_brand or scrape_sitemap). Only needed to inspect rows —
+    save_items / save_price_listings take the handle directly.
+    Returns CSV rows [offset, offset+limit) (optionally only names containing name_query)
+    and next_offset (null once all rows have been read). limit is capped at 500."""
+    limit = max(1, min(limit, READ_RESULTS_MAX_ROWS))
+    offset = max(offset, 0)
+    try:
+        rows = select_results(result_handle, name_query=name_query, offset=offset, limit=limit + 1)
+    except KeyError as exc:
+        return {"error": exc.args[0]}
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "result_handle": result_handle,
+        "offset": offset,
+        "count": len(rows),
+        "products_csv": _products_to_csv(rows, _csv_fields(result_handle, rows)) if rows else "",
+        "next_offset": offset + len(rows) if has_more else None,
+    }
+
+
+def _handle_summary(results: ResultWriter, fields: list[str]) -> dict:
+    """Tool output for rows stored behind a handle: count, sample CSV, handle."""
+    summary = {
+        "count": results.count,
+        "products_csv": _products_to_csv(results.preview, fields) if results.count else "",
+        "result_handle": results.handle,
+    }
+    if results.count > len(results.preview):
+        summary["note"] = HANDLE_NOTE.format(
+            shown=len(results.preview), count=results.count, handle=results.handle,
+        )
+    return summary
+
+
+def _csv_fields(result_handle: str, rows: list[dict]) -> list[str]:
+    kind = result_handle.split("-", 1)[0]
+    if kind == "crawl":
+        return CRAWL_CSV_FIELDS
+    if kind == "sitemap":
+        return SITEMAP_CSV_FIELDS
+    return STORE_CSV_FIELDS + ["product_url"] if rows and "product_url" in rows[0] else STORE_CSV_FIELDS
+
+
+@mcp.tool()
+@tool_pool.limited
 def detect_platform(domain: str) -> dict:
     """Detect what e-commerce platform a domain runs on.
     Checks Shopify products.json API first, then HTML for cdn.shopify.com markers.
     Returns {domain, platform: "shopify"|"generic"|"blocked", note?}.
     Use this to decide which scraper tool to call for an unknown domain."""
-    import httpx as _httpx
-
     domain = domain.strip().rstrip("/")
     if domain.startswith(("http://", "https://")):
         domain = domain.split("//", 1)[1].split("/")[0]
 
     # 1) Try Shopify products.json endpoint
     try:
-        with _httpx.Client(timeout=10.0, follow_redirects=True) as client:
-            resp = client.get(f"https://{domain}/products.json?limit=1")
-            if resp.status_code == 200:
-                data = resp.json()
-                if "products" in data:
-                    return {
-                        "domain": domain,
-                        "platform": "shopify",
-                        "note": "Confirmed via /products.json API",
-                    }
+        resp = get_client(domain).get("/products.json?limit=1", timeout=10.0)
+        if resp.status_code == 200:
+            data = resp.json()
+            if "products" in data:
+                return {
+                    "domain": domain,
+                    "platform": "shopify",
+                    "note": "Confirmed via /products.json API",
+                }
     except Exception:
         pass
 
     # 2) Fetch homepage and check for Shopify markers / bot protection
     try:
-        resp = _fetch_with_fallback(f"https://{domain}/")
-        html = resp.text[:5000]
+        resp = _fetch_with_fallback(f"https://{domain}/", max_bytes=DETECT_MAX_BYTES)
+        html = resp.head_text(5000)
 
         if _is_bot_challenge(html):
             return {
@@ -533,5 +541,33 @@ def detect_platform(domain: str) -> dict:
         }
 
 
+@mcp.custom_route("/cache/stats", methods=["GET"])
+async def cache_stats(request: Request) -> JSONResponse:
+    """Page cache hit rates, for operators (not exposed as an agent tool)."""
+    return JSONResponse(page_cache.stats())
+
+
+@mcp.custom_route("/tools/stats", methods=["GET"])
+async def tool_stats(request: Request) -> JSONResponse:
+    """Per-tool queue depth and concurrency of the process that answers."""
+    return JSONResponse(tool_pool.stats())
+
+
+def create_app():
+    """ASGI app factory for multi-process serving (each worker imports this module)."""
+    return mcp.streamable_http_app()
+
+
 if __name__ == "__main__":
-    mcp.run(transport="streamable-http")
+    if settings.SCRAPER_MCP_WORKERS > 1:
+        import uvicorn
+
+        uvicorn.run(
+            "scraper.mcp_server:create_app",
+            factory=True,
+            host=mcp.settings.host,
+            port=mcp.settings.port,
+            workers=settings.SCRAPER_MCP_WORKERS,
+        )
+    else:
+        mcp.run(transport="streamable-http")
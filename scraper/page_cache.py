@@ -0,0 +1,336 @@
+"""On-disk page cache for the scraper MCP tools.
+
+Responses are keyed by normalized URL (lowercased host, sorted query, no
+fragment or tracking params) and stored content-addressed: the index row
+points at a body file named by the sha256 of its bytes, so identical pages
+under different URLs are stored once. Freshness is decided per tool at read
+time (a sitemap stays fresh longer than a listing page); stale entries with
+an ETag or Last-Modified are revalidated with a conditional request and a 304
+refreshes them without a download. The cache is size-bounded and evicts the
+least recently used entries first.
+
+The index is SQLite (WAL) so several MCP server processes can share one
+cache directory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from tokyoradar_shared.config import settings
+
+from scraper.mcp_helpers import FetchedResponse, _fetch_with_fallback
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached page stays fresh, per calling tool
+CACHE_TTL: dict[str, int] = {
+    "fetch_page": 3600,
+    "crawl_products": 6 * 3600,
+    "scrape_sitemap": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+MAX_ENTRY_BYTES = 16 * 1024 * 1024  # larger bodies are served but not cached
+EVICT_TO_FRACTION = 0.9  # evict down to this share of the size bound
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "_ga", "mc_cid", "mc_eid")
+# Response headers kept with a cached body
+KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    encoding TEXT,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+CREATE INDEX IF NOT EXISTS pages_body_hash ON pages (body_hash);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Cache identity of a URL: scheme/host lowercased, default port, fragment and
+    tracking params dropped, query params sorted."""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host if port in (None, 80 if scheme == "http" else 443) else f"{host}:{port}"
+    query = urlencode(sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class PageCache:
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.enabled = bool(directory)
+        self.max_bytes = max_bytes
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._counts: dict[str, Counter] = {}
+        self._evictions = 0
+
+    def fetch(
+        self,
+        url: str,
+        tool: str,
+        fetcher: Callable[..., Any] = _fetch_with_fallback,
+        **fetch_options: Any,
+    ) -> FetchedResponse:
+        """Return the page for url, from cache when fresh for this tool.
+
+        fetcher(url, headers=..., **fetch_options) performs the network
+        request; it receives conditional headers when a stale entry can be
+        revalidated. Truncated (partial) responses are returned but never cached.
+        """
+        key = normalize_url(url)
+        ttl = CACHE_TTL.get(tool, DEFAULT_TTL)
+        now = time.time()
+        entry = self._lookup(key)
+
+        if entry is not None and now - entry["fetched_at"] < ttl:
+            cached = self._load(entry)
+            if cached is not None:
+                self._count(tool, "hits")
+                self._touch(key, now)
+                return cached
+
+        conditional: dict[str, str] = {}
+        if entry is not None:
+            if entry["etag"]:
+                conditional["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                conditional["If-Modified-Since"] = entry["last_modified"]
+
+        resp = fetcher(url, headers=conditional or None, **fetch_options)
+        if resp.status_code == 304 and entry is not None:
+            cached = self._load(entry)
+            if cached is not None:
+                self._count(tool, "revalidated")
+                self._touch(key, now, refreshed=True)
+                return cached
+            resp = fetcher(url, **fetch_options)  # body was evicted meanwhile
+
+        self._count(tool, "misses")
+        response = _as_fetched_response(resp, url)
+        self.put(url, response)
+        return response
+
+    def get(self, url: str, tool: str) -> FetchedResponse | None:
+        """Fresh cached page for url, or None. For callers that stream the
+        network response themselves and put() it afterwards."""
+        key = normalize_url(url)
+        now = time.time()
+        entry = self._lookup(key)
+        if entry is not None and now - entry["fetched_at"] < CACHE_TTL.get(tool, DEFAULT_TTL):
+            cached = self._load(entry)
+            if cached is not None:
+                self._count(tool, "hits")
+                self._touch(key, now)
+                return cached
+        self._count(tool, "misses")
+        return None
+
+    def put(self, url: str, response: FetchedResponse) -> None:
+        """Store a complete 200 response (e.g. one fetched outside fetch())."""
+        if (
+            response.status_code == 200
+            and not response.truncated
+            and len(response.content) <= MAX_ENTRY_BYTES
+        ):
+            self._store(normalize_url(url), response, time.time())
+
+    def stats(self) -> dict:
+        """Hit/miss counts of this process, and the shared cache's size."""
+        with self._lock:
+            counts = {tool: dict(c) for tool, c in self._counts.items()}
+        total = Counter()
+        for tool_counts in counts.values():
+            total.update(tool_counts)
+        lookups = total["hits"] + total["revalidated"] + total["misses"]
+
+        entries, size = 0, 0
+        if self._connect() is not None:
+            with self._lock:
+                entries, size = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+                ).fetchone()
+        return {
+            "hits": total["hits"],
+            "revalidated": total["revalidated"],
+            "misses": total["misses"],
+            "evictions": self._evictions,
+            "hit_rate": round((total["hits"] + total["revalidated"]) / lookups, 3) if lookups else 0.0,
+            "by_tool": counts,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _lookup(self, key: str) -> sqlite3.Row | None:
+        if self._connect() is None:
+            return None
+        with self._lock:
+            return self._db.execute("SELECT * FROM pages WHERE url_key = ?", (key,)).fetchone()
+
+    def _load(self, entry: sqlite3.Row) -> FetchedResponse | None:
+        try:
+            content = self._body_path(entry["body_hash"]).read_bytes()
+        except OSError:
+            return None
+        headers = {
+            name: entry[column]
+            for name, column in zip(KEPT_HEADERS, ("content_type", "etag", "last_modified"))
+            if entry[column]
+        }
+        return FetchedResponse(
+            url=entry["url"],
+            status_code=entry["status"],
+            content=content,
+            encoding=entry["encoding"] or "utf-8",
+            headers=headers,
+            from_cache=True,
+        )
+
+    def _touch(self, key: str, now: float, refreshed: bool = False) -> None:
+        with self._lock:
+            if refreshed:
+                self._db.execute(
+                    "UPDATE pages SET last_access = ?, fetched_at = ? WHERE url_key = ?",
+                    (now, now, key),
+                )
+            else:
+                self._db.execute("UPDATE pages SET last_access = ? WHERE url_key = ?", (now, key))
+
+    def _store(self, key: str, response: FetchedResponse, now: float) -> None:
+        if self._connect() is None:
+            return
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        path = self._body_path(body_hash)
+        try:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(response.content)
+                os.replace(tmp, path)  # readers never see a partial body
+        except OSError as exc:
+            logger.warning("Page cache write failed for %s: %s", response.url, exc)
+            return
+
+        with self._lock:
+            old = self._db.execute(
+                "SELECT body_hash FROM pages WHERE url_key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, response.url, body_hash, len(response.content),
+                    response.status_code, response.encoding,
+                    response.headers.get("content-type"),
+                    response.headers.get("etag"),
+                    response.headers.get("last-modified"),
+                    now, now,
+                ),
+            )
+            if old is not None and old["body_hash"] != body_hash:
+                self._drop_body_if_unused(old["body_hash"])
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries once over the size bound (lock held)."""
+        (size,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()
+        if size <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TO_FRACTION
+        victims = self._db.execute(
+            "SELECT url_key, body_hash, size FROM pages ORDER BY last_access"
+        )
+        dropped: list[tuple[str, str]] = []
+        for row in victims:
+            if size <= target:
+                break
+            dropped.append((row["url_key"], row["body_hash"]))
+            size -= row["size"]
+        for key, body_hash in dropped:
+            self._db.execute("DELETE FROM pages WHERE url_key = ?", (key,))
+            self._drop_body_if_unused(body_hash)
+        self._evictions += len(dropped)
+        logger.debug("Page cache evicted %d entries", len(dropped))
+
+    def _drop_body_if_unused(self, body_hash: str) -> None:
+        in_use = self._db.execute(
+            "SELECT 1 FROM pages WHERE body_hash = ? LIMIT 1", (body_hash,)
+        ).fetchone()
+        if in_use is None:
+            self._body_path(body_hash).unlink(missing_ok=True)
+
+    def _body_path(self, body_hash: str) -> Path:
+        return self.directory / "bodies" / body_hash[:2] / body_hash
+
+    def _count(self, tool: str, outcome: str) -> None:
+        with self._lock:
+            self._counts.setdefault(tool, Counter())[outcome] += 1
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._db is not None or not self.enabled:
+            return self._db
+        with self._lock:
+            if self._db is None and self.enabled:
+                try:
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    db = sqlite3.connect(
+                        self.directory / "index.sqlite3",
+                        timeout=10.0,
+                        check_same_thread=False,
+                        isolation_level=None,  # autocommit; each statement is atomic
+                    )
+                    db.row_factory = sqlite3.Row
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.executescript(_SCHEMA)
+                    self._db = db
+                except (OSError, sqlite3.Error) as exc:
+                    logger.warning("Page cache unavailable at %s: %s", self.directory, exc)
+                    self.enabled = False
+        return self._db
+
+
+def _as_fetched_response(resp: Any, url: str) -> FetchedResponse:
+    """Adapt a fetcher's return value; _fetch_with_fallback already returns one."""
+    if isinstance(resp, FetchedResponse):
+        return resp
+    headers = {
+        name: resp.headers[name]
+        for name in KEPT_HEADERS
+        if resp.headers.get(name)
+    }
+    return FetchedResponse(
+        url=str(getattr(resp, "url", None) or url),
+        status_code=resp.status_code,
+        content=resp.content,
+        encoding=getattr(resp, "encoding", None) or "utf-8",
+        headers=headers,
+    )
+
+
+page_cache = PageCache(settings.PAGE_CACHE_DIR, settings.PAGE_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,327 @@
+"""Concurrent, streaming sitemap engine behind the scrape_sitemap MCP tool.
+
+Child sitemaps of an index are fetched concurrently (worker threads, like the
+crawl engine). Each body is streamed through an incremental gzip decoder, for
+.xml.gz files, into an XML pull parser. Brand filtering and the lastmod
+cursor are applied per <url> as it is parsed, so only matches are kept in
+memory. Sitemap indexes may nest.
+
+Sitemaps are fetched with curl_cffi browser impersonation (they usually sit
+outside bot protection) and fall back to the pooled httpx client when
+curl_cffi is missing or its request fails. Complete
+bodies go into the page cache so repeat runs skip the network.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import threading
+import zlib
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from tokyoradar_shared.config import settings
+
+from scraper.http_clients import lease_client
+from scraper.mcp_helpers import BROWSER_HEADERS, FetchedResponse
+from scraper.page_cache import MAX_ENTRY_BYTES, page_cache
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_CONCURRENCY = 8  # child sitemaps fetched at once
+MAX_SITEMAPS = 500  # safety bound on index fan-out
+SITEMAP_TIMEOUT = 30
+_GZIP_MAGIC = b"\x1f\x8b"
+_GZIP_WBITS = 31  # zlib wbits for gzip framing
+_CURSOR_KEY = "scraper:sitemap_cursor:{domain}:{brand}"
+
+
+@dataclass
+class SitemapEntry:
+    loc: str
+    lastmod: datetime | None = None
+
+
+@dataclass
+class SitemapScan:
+    """What one sitemap file yielded."""
+
+    urls: list[SitemapEntry] = field(default_factory=list)  # matching page URLs
+    sitemaps: list[SitemapEntry] = field(default_factory=list)  # children, if an index
+    scanned: int = 0  # <url> entries parsed, matching or not
+    error: str | None = None  # set when the file was cut short; entries after it were not read
+
+
+@dataclass
+class SitemapResult:
+    urls: list[SitemapEntry] = field(default_factory=list)
+    sitemaps_fetched: int = 0
+    urls_scanned: int = 0
+    errors: list[str] = field(default_factory=list)
+    # Newest lastmod among matches; None if any sitemap failed or was cut short,
+    # since URLs in it were not seen and must stay ahead of the cursor
+    high_water_mark: datetime | None = None
+
+
+class SitemapEngine:
+    def __init__(
+        self,
+        keep: Callable[[str], bool],
+        since: datetime | None = None,
+        max_concurrency: int = SITEMAP_CONCURRENCY,
+        max_sitemaps: int = MAX_SITEMAPS,
+    ) -> None:
+        self.keep = keep
+        self.since = since
+        self.max_concurrency = max_concurrency
+        self.max_sitemaps = max_sitemaps
+
+    async def run(self, root_url: str) -> SitemapResult:
+        result = SitemapResult()
+        pending = [root_url]
+        seen = {root_url}
+        in_flight: dict[asyncio.Task, str] = {}
+
+        try:
+            while pending or in_flight:
+                while (
+                    pending
+                    and len(in_flight) < self.max_concurrency
+                    and result.sitemaps_fetched + len(in_flight) < self.max_sitemaps
+                ):
+                    url = pending.pop()
+                    in_flight[asyncio.create_task(asyncio.to_thread(self.scan, url))] = url
+                if not in_flight:
+                    result.errors.append(f"sitemap limit of {self.max_sitemaps} reached")
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = in_flight.pop(task)
+                    try:
+                        scan = task.result()
+                    except Exception as exc:
+                        result.errors.append(f"{url}: {exc}")
+                        continue
+                    result.sitemaps_fetched += 1
+                    result.urls_scanned += scan.scanned
+                    if scan.error:
+                        result.errors.append(f"{url}: {scan.error}")
+                    result.urls.extend(scan.urls)
+                    for child in scan.sitemaps:
+                        if child.loc not in seen and self._is_new(child.lastmod):
+                            seen.add(child.loc)
+                            pending.append(child.loc)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        stamps = [entry.lastmod for entry in result.urls if entry.lastmod]
+        if stamps and not result.errors:
+            result.high_water_mark = max(stamps)
+        return result
+
+    def scan(self, url: str) -> SitemapScan:
+        """Fetch and parse one sitemap file (runs in a worker thread)."""
+        scan = SitemapScan()
+        parser = XMLPullParser(events=("start", "end"))
+        root = None
+        try:
+            for chunk in _decoded_chunks(_sitemap_bytes(url)):
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if root is None:
+                        root = elem
+                        continue
+                    if event != "end":
+                        continue
+                    tag = _local_name(elem.tag)
+                    if tag not in ("url", "sitemap"):
+                        continue
+                    entry = _entry(elem)
+                    if entry is not None:
+                        if tag == "sitemap":
+                            scan.sitemaps.append(entry)
+                        else:
+                            scan.scanned += 1
+                            if self._is_new(entry.lastmod) and self.keep(entry.loc):
+                                scan.urls.append(entry)
+                    root.clear()  # drop parsed entries; memory stays flat
+            parser.close()
+        except ParseError as exc:
+            # Keep what parsed before the damage; truncated sitemaps are common
+            logger.warning("Sitemap %s is malformed after %d urls: %s", url, scan.scanned, exc)
+            scan.error = f"malformed after {scan.scanned} urls: {exc}"
+        return scan
+
+    def _is_new(self, lastmod: datetime | None) -> bool:
+        # Entries without lastmod can't be ruled out
+        return self.since is None or lastmod is None or lastmod > self.since
+
+
+def brand_matcher(brand_name: str) -> Callable[[str], bool]:
+    """URL filter for a brand, tolerant of slug styles ("comme des garcons" matches
+    comme-des-garcons, comme_des_garcons and commedesgarcons)."""
+    words = re.findall(r"\w+", brand_name.lower())
+    variants = {sep.join(words) for sep in (" ", "-", "_", "", "+", "%20")} - {""}
+
+    def keep(url: str) -> bool:
+        lower = url.lower()
+        return any(variant in lower for variant in variants)
+
+    return keep
+
+
+def _sitemap_bytes(url: str) -> Iterator[bytes]:
+    """Raw body chunks of a sitemap: from the page cache, else streamed from the
+    network (and cached once complete, if small enough)."""
+    cached = page_cache.get(url, "scrape_sitemap")
+    if cached is not None:
+        for start in range(0, len(cached.content), 64 * 1024):
+            yield cached.content[start:start + 64 * 1024]
+        return
+
+    body = bytearray()
+    cacheable = True
+    for chunk in _stream(url):
+        if cacheable:
+            body += chunk
+            if len(body) > MAX_ENTRY_BYTES:
+                cacheable = False
+                body = bytearray()
+        yield chunk
+    if cacheable:
+        page_cache.put(url, FetchedResponse(url=url, status_code=200, content=bytes(body)))
+
+
+def _stream(url: str) -> Iterator[bytes]:
+    """Body chunks via curl_cffi, else httpx. A curl_cffi failure falls back to
+    httpx only before any bytes were yielded; after that it is raised, since
+    the consumer has already parsed part of the body."""
+    try:
+        from curl_cffi import requests as cffi_requests
+    except ImportError:
+        cffi_requests = None
+
+    if cffi_requests is not None:
+        started = False
+        try:
+            resp = cffi_requests.get(url, impersonate="chrome", timeout=SITEMAP_TIMEOUT, stream=True)
+            try:
+                if resp.status_code != 200:
+                    raise ValueError(f"returned {resp.status_code}")
+                for chunk in resp.iter_content():
+                    started = True
+                    yield chunk
+            finally:
+                resp.close()
+            return
+        except Exception as exc:
+            if started:
+                raise
+            logger.debug("curl_cffi failed for %s (%s), retrying with httpx", url, exc)
+
+    with lease_client(urlparse(url).netloc) as client, client.stream(
+        "GET", url, headers=BROWSER_HEADERS, timeout=SITEMAP_TIMEOUT,
+    ) as resp:
+        if resp.status_code != 200:
+            raise ValueError(f"returned {resp.status_code}")
+        yield from resp.iter_bytes()
+
+
+def _decoded_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Pass XML through; gunzip .xml.gz bodies (detected by magic bytes) as they stream."""
+    decompressor = None
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if first:
+            first = False
+            if chunk[:2] == _GZIP_MAGIC:
+                decompressor = zlib.decompressobj(_GZIP_WBITS)
+        yield decompressor.decompress(chunk) if decompressor else chunk
+    if decompressor is not None:
+        yield decompressor.flush()
+
+
+def _entry(elem) -> SitemapEntry | None:
+    loc, lastmod = None, None
+    for child in elem:
+        name = _local_name(child.tag)
+        if name == "loc" and child.text:
+            loc = child.text.strip()
+        elif name == "lastmod" and child.text:
+            lastmod = _parse_lastmod(child.text)
+    return SitemapEntry(loc, lastmod) if loc else None
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_lastmod(value: str) -> datetime | None:
+    """W3C datetime (date-only or full) as an aware UTC datetime."""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class SitemapCursors:
+    """Newest lastmod seen per (domain, brand), in Redis when available."""
+
+    def __init__(self, redis_url: str | None = None) -> None:
+        self.redis_url = redis_url
+        self._local: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+
+    def get(self, domain: str, brand: str) -> datetime | None:
+        key = _CURSOR_KEY.format(domain=domain, brand=brand.lower())
+        value = self._local.get(key)
+        client = self._client()
+        if client is not None:
+            try:
+                stored = client.get(key)
+                value = stored.decode() if stored else value
+            except Exception as exc:
+                logger.debug("Sitemap cursor lookup failed for %s: %s", key, exc)
+        return _parse_lastmod(value) if value else None
+
+    def advance(self, domain: str, brand: str, mark: datetime) -> None:
+        """Move the cursor forward (never back)."""
+        current = self.get(domain, brand)
+        if current is not None and current >= mark:
+            return
+        key = _CURSOR_KEY.format(domain=domain, brand=brand.lower())
+        with self._lock:
+            self._local[key] = mark.isoformat()
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(key, mark.isoformat())
+            except Exception as exc:
+                logger.debug("Sitemap cursor store failed for %s: %s", key, exc)
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                return None
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.5)
+        return self._redis
+
+
+sitemap_cursors = SitemapCursors(settings.REDIS_URL)
@@ -1,9 +1,13 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
 from dataclasses import dataclass, field
 from decimal import Decimal
 
 import httpx
 
+from scraper.http_clients import get_async_client, get_client
+
 
 @dataclass
 class RawProduct:
@@ -29,34 +33,49 @@ class RawProduct:
 
 
 class BrandScraper(ABC):
+    # Sent with every request; the pooled clients themselves are shared across callers
+    headers = {"User-Agent": "TokyoRadar/1.0"}
+
     def __init__(self, domain: str, proxy_url: str | None = None):
         self.domain = domain
         self.proxy_url = proxy_url
-        self._client: httpx.Client | None = None
 
     @property
     def client(self) -> httpx.Client:
-        if self._client is None:
-            self._client = httpx.Client(
-                base_url=f"https://{self.domain}",
-                headers={"User-Agent": "TokyoRadar/1.0"},
-                timeout=30.0,
-                follow_redirects=True,
-                proxy=self.proxy_url,
-            )
-        return self._client
+        """Pooled client for this domain, shared process-wide."""
+        return get_client(self.domain, self.proxy_url)
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Pooled async client for this domain on the running event loop."""
+        return get_async_client(self.domain, self.proxy_url)
 
     @abstractmethod
-    def scrape_products(self) -> list[RawProduct]:
+    def scrape_products(self) -> Iterator[RawProduct]:
+        """Yield products one at a time so callers never hold the whole catalog."""
         ...
 
+    async def ascrape_products(self) -> AsyncIterator[RawProduct]:
+        """Async scraping mode. Subclasses override this to fetch pages concurrently;
+        the default steps the blocking generator in a worker thread."""
+        it = self.scrape_products()
+        while (product := await asyncio.to_thread(next, it, None)) is not None:
+            yield product
+
     def close(self) -> None:
-        if self._client is not None:
-            self._client.close()
-            self._client = None
+        """Nothing to release — connections stay pooled in the client registry."""
+
+    async def aclose(self) -> None:
+        self.close()
 
     def __enter__(self):
         return self
 
     def __exit__(self, *args):
         self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
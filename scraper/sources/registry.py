@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import timedelta
 
 from scraper.sources.base import BrandScraper
 from scraper.sources.shopify import ShopifyBrandScraper
@@ -9,6 +10,8 @@ class ScraperConfig:
     scraper_class: type[BrandScraper]
     domain: str
     source: str  # identifier for ScrapeJob.source
+    incremental: bool = False  # scraper supports updated_since cursors
+    full_sweep_interval: timedelta = timedelta(hours=24)  # catches deletions
 
 
 SCRAPER_REGISTRY: dict[str, ScraperConfig] = {
@@ -16,16 +19,20 @@ SCRAPER_REGISTRY: dict[str, ScraperConfig] = {
         scraper_class=ShopifyBrandScraper,
         domain="us.nanamica.com",
         source="shopify:us.nanamica.com",
+        incremental=True,
     ),
 }
 
 
-def get_scraper(brand_slug: str, proxy_url: str | None = None) -> BrandScraper:
-    """Get a configured scraper instance for the given brand slug."""
+def get_scraper(
+    brand_slug: str, proxy_url: str | None = None, **scraper_kwargs,
+) -> BrandScraper:
+    """Get a configured scraper instance for the given brand slug.
+    Extra kwargs (e.g. updated_since) are passed to the scraper class."""
     config = SCRAPER_REGISTRY.get(brand_slug)
     if config is None:
         raise ValueError(f"No scraper configured for brand: {brand_slug}")
-    return config.scraper_class(domain=config.domain, proxy_url=proxy_url)
+    return config.scraper_class(domain=config.domain, proxy_url=proxy_url, **scraper_kwargs)
 
 
 def get_scraper_config(brand_slug: str) -> ScraperConfig | None:
@@ -1,5 +1,8 @@
+import asyncio
 import logging
 import re
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
 from decimal import Decimal
 
 from scraper.sources.base import BrandScraper, RawProduct
@@ -18,18 +21,41 @@ COLOR_KEYWORDS = {
     "yellow", "pink", "purple", "burgundy", "tan", "indigo", "camel",
 }
 
+# products.json page size (Shopify maximum)
+PAGE_SIZE = 250
+# Max products.json pages in flight at once in async mode
+MAX_CONCURRENT_PAGES = 4
+
 
 class ShopifyBrandScraper(BrandScraper):
-    """Scraper for Shopify-based brand stores using the public products.json API."""
+    """Scraper for Shopify-based brand stores using the public products.json API.
 
-    def scrape_products(self) -> list[RawProduct]:
-        products: list[RawProduct] = []
+    With ``updated_since`` set the scraper runs incrementally: it asks for
+    ``updated_at_min`` (honoured by stores that support it) and drops products
+    not updated after the cursor. Paging still runs to the first short page:
+    products.json is not ordered by ``updated_at``, so on stores that ignore
+    ``updated_at_min`` a page with nothing newer says nothing about later pages.
+    ``high_water_mark`` is the latest ``updated_at`` seen, to be stored as the
+    next run's cursor. Deletions are only visible to full sweeps.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        proxy_url: str | None = None,
+        updated_since: datetime | None = None,
+    ):
+        super().__init__(domain, proxy_url)
+        self.updated_since = updated_since
+        self.high_water_mark: datetime | None = None
+
+    def scrape_products(self) -> Iterator[RawProduct]:
+        count = 0
         page = 1
 
         while True:
             resp = self.client.get(
-                "/products.json",
-                params={"limit": 250, "page": page},
+                "/products.json", params=self._page_params(page), headers=self.headers,
             )
             resp.raise_for_status()
             data = resp.json()
@@ -38,16 +64,120 @@ class ShopifyBrandScraper(BrandScraper):
             if not batch:
                 break
 
-            for p in batch:
-                raw = self._parse_product(p)
-                if raw:
-                    products.append(raw)
+            for raw in self._parse_batch(batch):
+                count += 1
+                yield raw
 
-            if len(batch) < 250:
+            if self._is_last_page(batch):
                 break
             page += 1
 
-        logger.info("Scraped %d products from %s", len(products), self.domain)
+        logger.info("Scraped %d products from %s", count, self.domain)
+
+    async def ascrape_products(
+        self, max_concurrency: int = MAX_CONCURRENT_PAGES,
+    ) -> AsyncIterator[RawProduct]:
+        """Fetch products.json pages concurrently, yielding products in page order.
+
+        Page 1 is fetched alone — most stores fit in a single page. If it is full,
+        pages are requested speculatively with at most ``max_concurrency`` in flight;
+        the first short or empty page marks the end of the catalog and nothing past
+        it is scheduled. Pages are parsed as they arrive and buffered only until
+        every earlier page has been yielded, so memory is bounded by the window.
+        """
+        first = await self._afetch_page(1)
+        count = 0
+        for raw in self._parse_batch(first):
+            count += 1
+            yield raw
+
+        pages_fetched = 1
+        if not self._is_last_page(first):
+            last_page: int | None = None
+            next_page = 2
+            next_to_yield = 2
+            ready: dict[int, list[RawProduct]] = {}
+            in_flight: dict[asyncio.Task, int] = {}
+
+            try:
+                while True:
+                    while len(in_flight) < max_concurrency and (
+                        last_page is None or next_page <= last_page
+                    ):
+                        task = asyncio.create_task(self._afetch_page(next_page))
+                        in_flight[task] = next_page
+                        next_page += 1
+                    if not in_flight:
+                        break
+
+                    done, _ = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    for task in done:
+                        page = in_flight.pop(task)
+                        batch = task.result()
+                        ready[page] = self._parse_batch(batch)
+                        pages_fetched += 1
+                        if self._is_last_page(batch):
+                            last_page = page if last_page is None else min(last_page, page)
+
+                    # Drop speculative requests beyond the end of the catalog
+                    if last_page is not None:
+                        for task, page in list(in_flight.items()):
+                            if page > last_page:
+                                task.cancel()
+                                del in_flight[task]
+
+                    while next_to_yield in ready and (
+                        last_page is None or next_to_yield <= last_page
+                    ):
+                        for raw in ready.pop(next_to_yield):
+                            count += 1
+                            yield raw
+                        next_to_yield += 1
+            finally:
+                for task in in_flight:
+                    task.cancel()
+
+        logger.info(
+            "Scraped %d products from %s (%d pages, async)",
+            count, self.domain, pages_fetched,
+        )
+
+    async def _afetch_page(self, page: int) -> list[dict]:
+        resp = await self.async_client.get(
+            "/products.json", params=self._page_params(page), headers=self.headers,
+        )
+        resp.raise_for_status()
+        return resp.json().get("products", [])
+
+    def _page_params(self, page: int) -> dict:
+        params: dict = {"limit": PAGE_SIZE, "page": page}
+        if self.updated_since is not None:
+            params["updated_at_min"] = self.updated_since.isoformat()
+        return params
+
+    def _is_last_page(self, batch: list[dict]) -> bool:
+        # Only a short page ends the catalog; updated_at_min does the filtering
+        return len(batch) < PAGE_SIZE
+
+    def _is_updated(self, p: dict) -> bool:
+        updated_at = _parse_updated_at(p)
+        return updated_at is None or updated_at > self.updated_since
+
+    def _parse_batch(self, batch: list[dict]) -> list[RawProduct]:
+        products: list[RawProduct] = []
+        for p in batch:
+            updated_at = _parse_updated_at(p)
+            if updated_at is not None and (
+                self.high_water_mark is None or updated_at > self.high_water_mark
+            ):
+                self.high_water_mark = updated_at
+            if self.updated_since is not None and not self._is_updated(p):
+                continue
+            raw = self._parse_product(p)
+            if raw:
+                products.append(raw)
         return products
 
     def _parse_product(self, p: dict) -> RawProduct | None:
@@ -171,3 +301,13 @@ class ShopifyBrandScraper(BrandScraper):
         if found:
             return ", ".join(found)
         return None
+
+
+def _parse_updated_at(p: dict) -> datetime | None:
+    value = p.get("updated_at")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
@@ -1,20 +1,34 @@
+import hashlib
+import json
 import logging
-from dataclasses import asdict
+from dataclasses import fields
 from datetime import datetime, timezone
 
+from sqlalchemy import func, insert, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
 from scraper.celery_app import app
+from scraper.http_clients import run_in_worker_loop
 from scraper.sources.registry import get_scraper, get_scraper_config
 from scraper.validation import validate_products
 
 from tokyoradar_shared.database import SessionLocal
 from tokyoradar_shared.models import Brand, Item, Media, ScrapeJob
+from tokyoradar_shared.payloads import delete_payload, iter_payload, open_payload_writer
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 100  # products per validate_and_store task
+
 
 @app.task(name="scraper.tasks.trigger_brand_scrape", bind=True)
-def trigger_brand_scrape(self, brand_slug: str) -> dict:
-    """Create a ScrapeJob and kick off the scraping pipeline."""
+def trigger_brand_scrape(self, brand_slug: str, full: bool = False) -> dict:
+    """Create a ScrapeJob and kick off the scraping pipeline.
+
+    Sources that support it run incrementally from the last job's high-water
+    mark; a full sweep runs when forced, when there is no cursor yet, or when
+    the last full sweep is older than the source's full_sweep_interval.
+    """
     config = get_scraper_config(brand_slug)
     if config is None:
         return {"error": f"No scraper configured for brand: {brand_slug}"}
@@ -30,30 +44,31 @@ def trigger_brand_scrape(self, brand_slug: str) -> dict:
             source=config.source,
             status="pending",
             celery_task_id=self.request.id,
+            config=_plan_sync(db, brand.id, config, force_full=full),
         )
         db.add(job)
         db.commit()
         db.refresh(job)
 
         job_id = job.id
+        mode = job.config["mode"]
     finally:
         db.close()
 
-    # Chain: scrape -> validate & store
-    scrape_brand_products.apply_async(
-        args=[brand_slug, job_id],
-        link=validate_and_store.s(brand_slug, job_id),
-    )
+    # Scrape streams fixed-size chunks into validate_and_store tasks
+    scrape_brand_products.apply_async(args=[brand_slug, job_id])
 
-    return {"job_id": job_id, "brand_slug": brand_slug, "status": "started"}
+    return {"job_id": job_id, "brand_slug": brand_slug, "mode": mode, "status": "started"}
 
 
 @app.task(name="scraper.tasks.scrape_brand_products")
-def scrape_brand_products(brand_slug: str, job_id: int) -> list[dict]:
-    """Scrape products from a brand's website. Returns list of raw product dicts."""
+def scrape_brand_products(brand_slug: str, job_id: int) -> dict:
+    """Scrape products from a brand's website, dispatching one validate_and_store
+    task per CHUNK_SIZE products as they arrive. Returns a small summary only."""
     db = SessionLocal()
     try:
         job = db.query(ScrapeJob).get(job_id)
+        sync = dict(job.config or {}) if job else {}
         if job:
             job.status = "scraping"
             job.started_at = datetime.now(timezone.utc)
@@ -61,31 +76,44 @@ def scrape_brand_products(brand_slug: str, job_id: int) -> list[dict]:
     finally:
         db.close()
 
+    full_sweep = sync.get("mode", "full") == "full"
+    updated_since = None if full_sweep else datetime.fromisoformat(sync["cursor"])
+
     try:
-        with get_scraper(brand_slug) as scraper:
-            raw_products = scraper.scrape_products()
-
-        # Convert dataclass to dict for JSON serialization
-        result = []
-        for rp in raw_products:
-            d = asdict(rp)
-            # Convert Decimal to str for JSON
-            for key in ("price_usd", "compare_at_price_usd"):
-                if d.get(key) is not None:
-                    d[key] = str(d[key])
-            result.append(d)
+        seen_external_ids, chunks, high_water_mark = run_in_worker_loop(
+            _scrape_in_chunks(brand_slug, job_id, updated_since),
+        )
+        items_found = len(seen_external_ids)
 
         db = SessionLocal()
         try:
-            job = db.query(ScrapeJob).get(job_id)
+            # Deletions are only detectable when the whole catalog was walked
+            items_removed = (
+                _count_removed_items(db, brand_slug, seen_external_ids)
+                if full_sweep else None
+            )
+            job = _lock_job(db, job_id)
             if job:
-                job.items_found = len(result)
+                job.items_found = items_found
+                job.items_removed = items_removed
+                progress = dict(job.config or {})
+                progress["chunks_total"] = chunks
+                cursor = high_water_mark or updated_since
+                if cursor is not None:
+                    progress["high_water_mark"] = cursor.isoformat()
+                job.config = progress
+                if job.status == "scraping":
+                    job.status = "storing"
+                _complete_if_done(job)
                 db.commit()
         finally:
             db.close()
 
-        logger.info("Scraped %d products for %s (job %d)", len(result), brand_slug, job_id)
-        return result
+        logger.info(
+            "Scraped %d products in %d chunks for %s (job %d)",
+            items_found, chunks, brand_slug, job_id,
+        )
+        return {"job_id": job_id, "items_found": items_found, "chunks": chunks}
 
     except Exception as e:
         db = SessionLocal()
@@ -101,18 +129,117 @@ def scrape_brand_products(brand_slug: str, job_id: int) -> list[dict]:
         raise
 
 
+async def _scrape_in_chunks(
+    brand_slug: str, job_id: int, updated_since: datetime | None = None,
+) -> tuple[set[str], int, datetime | None]:
+    """Stream products from the scraper's async mode into compressed payload
+    batches, handing each full batch's reference to its own validate_and_store
+    task — product data never travels through the Celery broker.
+
+    Returns (external_ids_seen, chunks_dispatched, high_water_mark).
+    """
+    seen_external_ids: set[str] = set()
+    chunk_index = 0
+    writer = open_payload_writer()
+    scraper_kwargs = {"updated_since": updated_since} if updated_since else {}
+
+    async with get_scraper(brand_slug, **scraper_kwargs) as scraper:
+        async for rp in scraper.ascrape_products():
+            writer.write(_raw_product_to_dict(rp))
+            seen_external_ids.add(str(rp.external_id))
+            if writer.count >= CHUNK_SIZE:
+                validate_and_store.delay(writer.close(), brand_slug, job_id, chunk_index)
+                chunk_index += 1
+                writer = open_payload_writer()
+
+    if writer.count:
+        validate_and_store.delay(writer.close(), brand_slug, job_id, chunk_index)
+        chunk_index += 1
+
+    return seen_external_ids, chunk_index, getattr(scraper, "high_water_mark", None)
+
+
+def _raw_product_to_dict(rp) -> dict:
+    """Shallow field dict of a RawProduct (asdict would deep-copy raw_data).
+    Decimals are stringified by the payload encoder."""
+    return {f.name: getattr(rp, f.name) for f in fields(rp)}
+
+
+def _plan_sync(db, brand_id: int, config, force_full: bool = False) -> dict:
+    """Choose full vs incremental mode for a new ScrapeJob (stored as its config)."""
+    if force_full or not config.incremental:
+        return {"mode": "full"}
+
+    recent = (
+        db.query(ScrapeJob)
+        .filter(
+            ScrapeJob.brand_id == brand_id,
+            ScrapeJob.source == config.source,
+            ScrapeJob.status == "completed",
+            ScrapeJob.config["high_water_mark"].astext.isnot(None),
+        )
+        .order_by(ScrapeJob.created_at.desc())
+    )
+    last = recent.first()
+    last_full = recent.filter(ScrapeJob.config["mode"].astext == "full").first()
+    if last is None or last_full is None:
+        return {"mode": "full"}
+
+    full_sweep_due = last_full.created_at + config.full_sweep_interval
+    if full_sweep_due <= datetime.now(timezone.utc).replace(tzinfo=None):
+        return {"mode": "full"}
+
+    return {"mode": "incremental", "cursor": last.config["high_water_mark"]}
+
+
+def _count_removed_items(db, brand_slug: str, seen_external_ids: set[str]) -> int:
+    """Count pipeline-managed items of the brand that this scrape no longer returned."""
+    brand = db.query(Brand).filter(Brand.slug == brand_slug).first()
+    if brand is None:
+        return 0
+    query = db.query(func.count(Item.id)).filter(
+        Item.brand_id == brand.id,
+        Item.content_hash.isnot(None),
+    )
+    if seen_external_ids:
+        query = query.filter(Item.external_id.notin_(seen_external_ids))
+    return query.scalar() or 0
+
+
+def _lock_job(db, job_id: int) -> ScrapeJob | None:
+    """Load a ScrapeJob with a row lock — chunk tasks update its counters concurrently."""
+    return db.query(ScrapeJob).filter(ScrapeJob.id == job_id).with_for_update().first()
+
+
+def _complete_if_done(job: ScrapeJob) -> None:
+    """Mark the job completed once the scrape has finished and every chunk is stored."""
+    progress = job.config or {}
+    total = progress.get("chunks_total")
+    if job.status == "failed" or total is None:
+        return
+    if progress.get("chunks_done", 0) >= total:
+        job.status = "completed"
+        job.completed_at = datetime.now(timezone.utc)
+
+
 @app.task(name="scraper.tasks.validate_and_store")
-def validate_and_store(raw_products: list[dict], brand_slug: str, job_id: int) -> dict:
-    """Validate scraped products and upsert into the database."""
+def validate_and_store(
+    payload_ref: str,
+    brand_slug: str,
+    job_id: int,
+    chunk_index: int = 0,
+) -> dict:
+    """Validate one chunk of scraped products and upsert it into the database.
+
+    The chunk is read from the payload store by reference and deleted once
+    stored. Counters and flags are added to the ScrapeJob; the chunk that
+    brings chunks_done up to chunks_total marks the job completed.
+    """
     db = SessionLocal()
     try:
-        job = db.query(ScrapeJob).get(job_id)
-        if job:
-            job.status = "validating"
-            db.commit()
-
         brand = db.query(Brand).filter(Brand.slug == brand_slug).first()
         if not brand:
+            job = db.query(ScrapeJob).get(job_id)
             if job:
                 job.status = "failed"
                 job.errors = {"error": f"Brand not found: {brand_slug}"}
@@ -121,16 +248,11 @@ def validate_and_store(raw_products: list[dict], brand_slug: str, job_id: int) -
             return {"error": f"Brand not found: {brand_slug}"}
 
         # Validate
-        validated = validate_products(raw_products, brand_slug)
-
-        if job:
-            job.status = "storing"
-            db.commit()
+        validated = validate_products(iter_payload(payload_ref), brand_slug)
 
-        # Upsert valid items
-        items_stored = 0
         items_flagged = 0
         all_flags = []
+        rows_by_external_id: dict[str, dict] = {}
 
         for vp in validated:
             if vp.flags:
@@ -147,107 +269,47 @@ def validate_and_store(raw_products: list[dict], brand_slug: str, job_id: int) -
             if not vp.is_valid:
                 continue
 
-            raw = vp.data
-
-            # Upsert: find by brand_id + external_id
-            item = db.query(Item).filter(
-                Item.brand_id == brand.id,
-                Item.external_id == raw.get("external_id"),
-            ).first()
-
-            if item is None:
-                item = Item(brand_id=brand.id, external_id=raw.get("external_id"))
-                db.add(item)
-
-            # Update fields
-            item.name_en = raw.get("name", "")
-            item.handle = raw.get("handle")
-            item.vendor = raw.get("vendor")
-            item.product_type_raw = raw.get("product_type")
-            item.item_type = (raw.get("product_type") or "").lower().strip() or None
-            item.tags = raw.get("tags")
-            item.colors = raw.get("colors")
-            item.sizes = raw.get("sizes")
-            item.body_html_raw = raw.get("body_html")
-            item.season_code = raw.get("season_code")
-            item.sku = raw.get("sku")
-            item.in_stock = raw.get("in_stock", True)
-            item.primary_image_url = raw.get("primary_image_url")
-            item.source_url = raw.get("source_url")
-            item.material = raw.get("material")
-            item.shopify_data = raw.get("raw_data")
-
-            if raw.get("price_usd") is not None:
-                item.price_usd = raw["price_usd"]
-            if raw.get("compare_at_price_usd") is not None:
-                item.compare_at_price_usd = raw["compare_at_price_usd"]
-
-            items_stored += 1
-
-            # Upsert media for images
-            for idx, img_url in enumerate(raw.get("image_urls", [])):
-                existing = db.query(Media).filter(
-                    Media.entity_type == "item",
-                    Media.entity_id == item.id if item.id else None,
-                    Media.url == img_url,
-                ).first()
-                if existing is None and item.id:
-                    media = Media(
-                        entity_type="item",
-                        entity_id=item.id,
-                        url=img_url,
-                        media_type="image",
-                        sort_order=idx,
-                    )
-                    db.add(media)
-
-        db.flush()
-
-        # Now handle media for newly created items (which now have IDs)
-        for vp in validated:
-            if not vp.is_valid:
-                continue
-            raw = vp.data
-            item = db.query(Item).filter(
-                Item.brand_id == brand.id,
-                Item.external_id == raw.get("external_id"),
-            ).first()
-            if item:
-                for idx, img_url in enumerate(raw.get("image_urls", [])):
-                    existing = db.query(Media).filter(
-                        Media.entity_type == "item",
-                        Media.entity_id == item.id,
-                        Media.url == img_url,
-                    ).first()
-                    if existing is None:
-                        media = Media(
-                            entity_type="item",
-                            entity_id=item.id,
-                            url=img_url,
-                            media_type="image",
-                            sort_order=idx,
-                        )
-                        db.add(media)
-
-        # Update job
+            # Last occurrence wins — ON CONFLICT cannot touch the same row twice
+            rows_by_external_id[str(vp.data["external_id"])] = vp.data
+
+        items_new, items_changed = _bulk_upsert_items(
+            db, brand.id, list(rows_by_external_id.values()),
+        )
+        items_stored = len(rows_by_external_id)
+        items_unchanged = items_stored - items_new - items_changed
+
+        # Fold this chunk's counts into the job
+        job = _lock_job(db, job_id)
         if job:
-            job.status = "completed"
-            job.items_stored = items_stored
-            job.items_flagged = items_flagged
-            job.flags = all_flags if all_flags else None
-            job.completed_at = datetime.now(timezone.utc)
+            job.items_stored = (job.items_stored or 0) + items_stored
+            job.items_flagged = (job.items_flagged or 0) + items_flagged
+            job.items_new = (job.items_new or 0) + items_new
+            job.items_changed = (job.items_changed or 0) + items_changed
+            job.items_unchanged = (job.items_unchanged or 0) + items_unchanged
+            if all_flags:
+                job.flags = (job.flags or []) + all_flags
+            progress = dict(job.config or {})
+            progress["chunks_done"] = progress.get("chunks_done", 0) + 1
+            job.config = progress
+            _complete_if_done(job)
 
         db.commit()
+        delete_payload(payload_ref)
 
         logger.info(
-            "Job %d complete: %d stored, %d flagged for %s",
-            job_id, items_stored, items_flagged, brand_slug,
+            "Job %d chunk %d: %d new, %d changed, %d unchanged, %d flagged for %s",
+            job_id, chunk_index, items_new, items_changed, items_unchanged,
+            items_flagged, brand_slug,
         )
         return {
             "job_id": job_id,
+            "chunk_index": chunk_index,
             "items_stored": items_stored,
+            "items_new": items_new,
+            "items_changed": items_changed,
+            "items_unchanged": items_unchanged,
             "items_flagged": items_flagged,
-            "status": "completed",
+            "status": job.status if job else "completed",
         }
 
     except Exception as e:
@@ -256,7 +318,7 @@ def validate_and_store(raw_products: list[dict], brand_slug: str, job_id: int) -
             job = db.query(ScrapeJob).get(job_id)
             if job:
                 job.status = "failed"
-                job.errors = {"store_error": str(e)}
+                job.errors = {"store_error": str(e), "chunk_index": chunk_index}
                 job.completed_at = datetime.now(timezone.utc)
                 db.commit()
         except Exception:
@@ -266,6 +328,113 @@ def validate_and_store(raw_products: list[dict], brand_slug: str, job_id: int) -
         db.close()
 
 
+def _content_hash(row: dict, image_urls: list[str]) -> str:
+    """Stable fingerprint of everything the pipeline writes for an item."""
+    payload = json.dumps([row, image_urls], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _bulk_upsert_items(db, brand_id: int, products: list[dict]) -> tuple[int, int]:
+    """Upsert a chunk of products in a few statements. Returns (new, changed).
+
+    One INSERT ... ON CONFLICT (brand_id, external_id) for the items (served by
+    ix_items_brand_external) that only updates rows whose content_hash differs,
+    one SELECT for the written items' existing media, and one bulk INSERT for
+    the image rows that are missing. Unchanged rows are not touched at all.
+    """
+    if not products:
+        return 0, 0
+
+    rows = [
+        {
+            "brand_id": brand_id,
+            "external_id": str(raw["external_id"]),
+            "name_en": raw.get("name", ""),
+            "handle": raw.get("handle"),
+            "vendor": raw.get("vendor"),
+            "product_type_raw": raw.get("product_type"),
+            "item_type": (raw.get("product_type") or "").lower().strip() or None,
+            "tags": raw.get("tags"),
+            "colors": raw.get("colors"),
+            "sizes": raw.get("sizes"),
+            "body_html_raw": raw.get("body_html"),
+            "season_code": raw.get("season_code"),
+            "sku": raw.get("sku"),
+            "in_stock": raw.get("in_stock", True),
+            "primary_image_url": raw.get("primary_image_url"),
+            "source_url": raw.get("source_url"),
+            "material": raw.get("material"),
+            "shopify_data": raw.get("raw_data"),
+            "price_usd": raw.get("price_usd"),
+            "compare_at_price_usd": raw.get("compare_at_price_usd"),
+        }
+        for raw in products
+    ]
+    for row, raw in zip(rows, products):
+        row["content_hash"] = _content_hash(row, raw.get("image_urls") or [])
+
+    stmt = pg_insert(Item).values(rows)
+    excluded = stmt.excluded
+    update_cols = {
+        col: excluded[col]
+        for col in rows[0]
+        if col not in ("brand_id", "external_id", "price_usd", "compare_at_price_usd")
+    }
+    # A missing price in this scrape keeps the stored one
+    update_cols["price_usd"] = func.coalesce(excluded.price_usd, Item.price_usd)
+    update_cols["compare_at_price_usd"] = func.coalesce(
+        excluded.compare_at_price_usd, Item.compare_at_price_usd,
+    )
+    update_cols["updated_at"] = func.now()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Item.brand_id, Item.external_id],
+        set_=update_cols,
+        where=Item.content_hash.is_distinct_from(excluded.content_hash),
+    ).returning(
+        Item.id, Item.external_id,
+        # xmax is 0 for freshly inserted rows, non-zero for updated ones
+        literal_column("xmax = 0").label("inserted"),
+    )
+
+    item_ids: dict[str, int] = {}
+    items_new = 0
+    for item_id, ext_id, inserted in db.execute(stmt):
+        item_ids[ext_id] = item_id
+        items_new += bool(inserted)
+    if not item_ids:
+        return 0, 0
+
+    # Media: one lookup for everything this chunk already has, one insert for the rest
+    existing_media = set(
+        db.execute(
+            select(Media.entity_id, Media.url).where(
+                Media.entity_type == "item",
+                Media.entity_id.in_(item_ids.values()),
+            )
+        ).all()
+    )
+    new_media = []
+    for raw in products:
+        item_id = item_ids.get(str(raw["external_id"]))
+        if item_id is None:
+            continue
+        for idx, img_url in enumerate(raw.get("image_urls") or []):
+            if (item_id, img_url) in existing_media:
+                continue
+            existing_media.add((item_id, img_url))
+            new_media.append({
+                "entity_type": "item",
+                "entity_id": item_id,
+                "url": img_url,
+                "media_type": "image",
+                "sort_order": idx,
+            })
+    if new_media:
+        db.execute(insert(Media), new_media)
+
+    return items_new, len(item_ids) - items_new
+
+
 # Keep legacy stubs for backward compatibility
 @app.task(name="scraper.tasks.scrape_fashion_press")
 def scrape_fashion_press():
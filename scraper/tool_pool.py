@@ -0,0 +1,153 @@
+"""Admission control for the scraper MCP tools.
+
+FastMCP calls sync tools directly on the event loop, so one slow fetch_page
+or detect_platform stalls every other agent's request. Tools wrapped with
+tool_pool.limited run their sync body on a bounded thread pool instead, and
+every tool (sync or async) is admitted through a per-tool semaphore, so a
+burst of crawls cannot starve cheap lookups. Requests over a tool's limit
+wait in line; the line's depth and wait times are exposed by stats().
+
+The pool is also installed as the event loop's default executor, so the
+asyncio.to_thread work of the crawl and sitemap engines shares the same
+thread budget. Limits and counters are per process; with several server
+processes (SCRAPER_MCP_WORKERS) each process has its own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from tokyoradar_shared.config import settings
+
+# Calls of each tool admitted at once per process. The async crawl/sitemap tools
+# fan out into their own worker threads (up to 7 and 8 per call), so their
+# limits are low; the sizes keep the busiest mix within SCRAPER_MCP_THREADS.
+TOOL_CONCURRENCY: dict[str, int] = {
+    "crawl_products": 4,
+    "scrape_sitemap": 2,
+    "scrape_brand": 2,
+    "scrape_shopify_store": 4,
+    "fetch_page": 12,
+    "detect_platform": 8,
+    "read_results": 8,
+}
+DEFAULT_TOOL_CONCURRENCY = 4
+
+
+@dataclass
+class ToolStats:
+    limit: int
+    running: int = 0
+    queued: int = 0  # calls waiting for a slot right now
+    max_queued: int = 0
+    completed: int = 0  # calls that returned
+    failed: int = 0  # calls that raised
+    wait_seconds: float = 0.0  # total time calls spent queued
+    run_seconds: float = 0.0  # total run time of completed calls
+
+
+class ToolPool:
+    def __init__(
+        self,
+        max_threads: int,
+        limits: dict[str, int] | None = None,
+        default_limit: int = DEFAULT_TOOL_CONCURRENCY,
+    ) -> None:
+        self.max_threads = max_threads
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self._executor = ThreadPoolExecutor(max_threads, thread_name_prefix="mcp-tool")
+        self._stats: dict[str, ToolStats] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._loops: set[int] = set()
+
+    def limited(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a tool: admit through its semaphore, run sync bodies on the pool.
+
+        Apply below @mcp.tool(); the wrapper keeps fn's name, docstring and
+        signature, so the tool schema is unchanged.
+        """
+        name = fn.__name__
+        stats = self._stats.setdefault(
+            name, ToolStats(limit=self.limits.get(name, self.default_limit))
+        )
+        is_async = inspect.iscoroutinefunction(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            loop = asyncio.get_running_loop()
+            self._install(loop)
+            semaphore = self._semaphore(name, stats.limit)
+
+            queued_at = time.monotonic()
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+            try:
+                await semaphore.acquire()
+            finally:
+                stats.queued -= 1
+
+            started = time.monotonic()
+            stats.wait_seconds += started - queued_at
+            stats.running += 1
+            try:
+                if is_async:
+                    result = await fn(*args, **kwargs)
+                else:
+                    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+                    result = await loop.run_in_executor(self._executor, call)
+            except Exception:
+                stats.failed += 1
+                raise
+            else:
+                stats.completed += 1
+                stats.run_seconds += time.monotonic() - started
+                return result
+            finally:
+                stats.running -= 1
+                semaphore.release()
+
+        return wrapper
+
+    def stats(self) -> dict:
+        """Per-tool queue depth, concurrency and timings for this process."""
+        tools = {}
+        for name, stats in self._stats.items():
+            row = asdict(stats)
+            admitted = stats.completed + stats.failed
+            row["avg_wait_seconds"] = round(stats.wait_seconds / admitted, 3) if admitted else 0.0
+            row["avg_run_seconds"] = round(stats.run_seconds / stats.completed, 3) if stats.completed else 0.0
+            row["wait_seconds"] = round(stats.wait_seconds, 3)
+            row["run_seconds"] = round(stats.run_seconds, 3)
+            tools[name] = row
+        return {
+            "pid": os.getpid(),
+            "max_threads": self.max_threads,
+            "queued": sum(s.queued for s in self._stats.values()),
+            "running": sum(s.running for s in self._stats.values()),
+            "tools": tools,
+        }
+
+    def _semaphore(self, name: str, limit: int) -> asyncio.Semaphore:
+        # Created on first use so it binds to the server's loop, not the importer's
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def _install(self, loop: asyncio.AbstractEventLoop) -> None:
+        if id(loop) not in self._loops:
+            self._loops.add(id(loop))
+            loop.set_default_executor(self._executor)
+
+
+tool_pool = ToolPool(settings.SCRAPER_MCP_THREADS, TOOL_CONCURRENCY)
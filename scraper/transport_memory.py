@@ -0,0 +1,91 @@
+"""Per-domain transport memory for _fetch_with_fallback.
+
+Remembers which transport works for a domain — plain httpx, curl_cffi browser
+impersonation, or neither (blocked) — so protected sites are not downloaded
+twice per page. Profiles expire after a TTL and are shared across workers via
+Redis; a process-local copy avoids a Redis round-trip on every fetch.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from tokyoradar_shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_HTTPX = "httpx"
+TRANSPORT_CURL_CFFI = "curl_cffi"
+TRANSPORT_BLOCKED = "blocked"
+
+# Seconds a learned profile stays valid; blocked is retried sooner
+PROFILE_TTL: dict[str, int] = {
+    TRANSPORT_HTTPX: 6 * 3600,
+    TRANSPORT_CURL_CFFI: 6 * 3600,
+    TRANSPORT_BLOCKED: 30 * 60,
+}
+LOCAL_CACHE_SECONDS = 60  # how long to trust the process-local copy
+_REDIS_KEY = "scraper:transport:{domain}"
+
+
+class TransportMemory:
+    def __init__(self, redis_url: str | None = None) -> None:
+        self.redis_url = redis_url
+        self._local: dict[str, tuple[str, float]] = {}  # domain -> (transport, expires_at)
+        self._lock = threading.Lock()
+        self._redis = None
+
+    def get(self, domain: str) -> str | None:
+        """Return the remembered transport for a domain, or None if unknown/expired."""
+        now = time.time()
+        with self._lock:
+            cached = self._local.get(domain)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        transport = None
+        client = self._client()
+        if client is not None:
+            try:
+                value = client.get(_REDIS_KEY.format(domain=domain))
+                transport = value.decode() if value else None
+            except Exception as exc:
+                logger.debug("Transport memory lookup failed for %s: %s", domain, exc)
+
+        with self._lock:
+            if transport:
+                self._local[domain] = (transport, now + LOCAL_CACHE_SECONDS)
+            else:
+                self._local.pop(domain, None)
+        return transport
+
+    def remember(self, domain: str, transport: str) -> None:
+        ttl = PROFILE_TTL[transport]
+        with self._lock:
+            previous = self._local.get(domain)
+            self._local[domain] = (transport, time.time() + min(ttl, LOCAL_CACHE_SECONDS))
+        if previous and previous[0] == transport:
+            return  # already shared; avoid a Redis write per fetch
+        logger.info("Transport for %s: %s", domain, transport)
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(_REDIS_KEY.format(domain=domain), transport, ex=ttl)
+            except Exception as exc:
+                logger.debug("Transport memory store failed for %s: %s", domain, exc)
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                return None
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.5)
+        return self._redis
+
+
+transport_memory = TransportMemory(settings.REDIS_URL)
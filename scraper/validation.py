@@ -1,4 +1,5 @@
 import logging
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from decimal import Decimal
 
@@ -56,10 +57,11 @@ class ProductValidator(BaseModel):
 
 
 def validate_products(
-    raw_products: list[dict],
+    raw_products: Iterable[dict],
     brand_slug: str,
 ) -> list[ValidatedProduct]:
-    """Validate a list of raw product dicts, returning validated results with flags."""
+    """Validate raw product dicts (any iterable, e.g. a streamed payload),
+    returning validated results with flags."""
     min_price, max_price = PRICE_BOUNDS.get(brand_slug, DEFAULT_PRICE_BOUNDS)
     results: list[ValidatedProduct] = []
 
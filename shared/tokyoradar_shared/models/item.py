@@ -53,6 +53,8 @@ class Item(Base):
         Numeric(10, 2), nullable=True
     )
     shopify_data: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # sha256 of the scraped fields — re-scrapes skip rows whose hash is unchanged
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     updated_at: Mapped[datetime | None] = mapped_column(
         onupdate=func.now(), nullable=True
     )
@@ -22,6 +22,10 @@ class ScrapeJob(Base):
     items_found: Mapped[int | None] = mapped_column(nullable=True)
     items_stored: Mapped[int | None] = mapped_column(nullable=True)
     items_flagged: Mapped[int | None] = mapped_column(nullable=True)
+    items_new: Mapped[int | None] = mapped_column(nullable=True)
+    items_changed: Mapped[int | None] = mapped_column(nullable=True)
+    items_unchanged: Mapped[int | None] = mapped_column(nullable=True)
+    items_removed: Mapped[int | None] = mapped_column(nullable=True)
     errors: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     flags: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     config: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
@@ -0,0 +1,154 @@
+"""Claim-check payload store for bulk data passed between Celery tasks.
+
+Producers write records into a compressed NDJSON batch and pass only the
+returned reference through the broker; consumers stream-decode the batch.
+
+Backend is chosen by settings.PAYLOAD_STORE_URL:
+  ""                      → Redis blobs on settings.REDIS_URL (shared across containers)
+  "redis://host:6379/1"   → Redis blobs on that server
+  "file:///shared/path"   → gzip files in that directory (needs a shared volume)
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from tokyoradar_shared.config import settings
+
+PAYLOAD_TTL_SECONDS = 24 * 3600  # Redis blobs expire even if never consumed
+_READ_CHUNK = 64 * 1024
+_GZIP_WBITS = 31  # zlib wbits for gzip framing
+
+
+def _encode(record: Any) -> bytes:
+    return (json.dumps(record, default=str, separators=(",", ":")) + "\n").encode()
+
+
+class PayloadWriter(ABC):
+    """Accumulates records into one compressed batch. close() returns its reference."""
+
+    count: int = 0
+
+    @abstractmethod
+    def write(self, record: Any) -> None:
+        """Append one JSON-serializable record to the batch."""
+
+    @abstractmethod
+    def close(self) -> str:
+        """Finish the batch and return the reference consumers open it by."""
+
+
+class _FileWriter(PayloadWriter):
+    def __init__(self, directory: Path, name: str) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{name}.ndjson.gz"
+        self._tmp = self.path.with_suffix(".tmp")
+        self._fh = gzip.open(self._tmp, "wb")
+        self.count = 0
+
+    def write(self, record: Any) -> None:
+        self._fh.write(_encode(record))
+        self.count += 1
+
+    def close(self) -> str:
+        self._fh.close()
+        os.replace(self._tmp, self.path)  # readers never see a partial file
+        return f"file://{self.path}"
+
+
+class _RedisWriter(PayloadWriter):
+    def __init__(self, redis_url: str, name: str) -> None:
+        self.redis_url = redis_url
+        self.key = f"payload:{name}"
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, _GZIP_WBITS)
+        self._buf = bytearray()  # compressed bytes only
+        self.count = 0
+
+    def write(self, record: Any) -> None:
+        self._buf += self._compressor.compress(_encode(record))
+        self.count += 1
+
+    def close(self) -> str:
+        self._buf += self._compressor.flush()
+        _redis(self.redis_url).set(self.key, bytes(self._buf), ex=PAYLOAD_TTL_SECONDS)
+        self._buf = bytearray()
+        return f"{self.redis_url}#{self.key}"
+
+
+def open_payload_writer(name: str | None = None) -> PayloadWriter:
+    """Open a writer on the configured payload backend.
+
+    name fixes the batch's identity (see payload_ref); by default it is random.
+    """
+    name = name or uuid.uuid4().hex
+    url = settings.PAYLOAD_STORE_URL or settings.REDIS_URL
+    if url.startswith("file://"):
+        return _FileWriter(Path(url.removeprefix("file://")), name)
+    return _RedisWriter(url, name)
+
+
+def payload_ref(name: str) -> str:
+    """Reference of the batch written with open_payload_writer(name) on the configured backend."""
+    url = settings.PAYLOAD_STORE_URL or settings.REDIS_URL
+    if url.startswith("file://"):
+        return f"file://{Path(url.removeprefix('file://')) / f'{name}.ndjson.gz'}"
+    return f"{url}#payload:{name}"
+
+
+def iter_payload(ref: str) -> Iterator[Any]:
+    """Stream-decode the records of a batch, one at a time."""
+    if ref.startswith("file://"):
+        path = Path(ref.removeprefix("file://"))
+        if not path.exists():
+            raise KeyError(f"Payload expired or missing: {ref}")
+        with gzip.open(path, "rb") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    redis_url, key = ref.rsplit("#", 1)
+    blob = _redis(redis_url).get(key)
+    if blob is None:
+        raise KeyError(f"Payload expired or missing: {ref}")
+
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    pending = b""
+    for start in range(0, len(blob), _READ_CHUNK):
+        pending += decompressor.decompress(blob[start:start + _READ_CHUNK])
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    pending += decompressor.flush()
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def delete_payload(ref: str) -> None:
+    """Drop a consumed batch."""
+    if ref.startswith("file://"):
+        Path(ref.removeprefix("file://")).unlink(missing_ok=True)
+        return
+    redis_url, key = ref.rsplit("#", 1)
+    _redis(redis_url).delete(key)
+
+
+_clients: dict[str, Any] = {}
+
+
+def _redis(url: str):
+    client = _clients.get(url)
+    if client is None:
+        import redis
+
+        client = _clients[url] = redis.Redis.from_url(url)
+    return client
@@ -0,0 +1,102 @@
+"""Server-side result handles for bulk scraped data.
+
+Scraping tools write their product rows here and return a short summary plus
+an opaque handle such as "crawl-1f0c9a2b3c4d5e6f". Tools on other services
+(the backend's save_items / save_price_listings, the agent's snapshot) read
+the rows back by handle, so bulk product lists never pass through the LLM.
+
+Rows live on the claim-check payload store (tokyoradar_shared.payloads), which
+every container can reach, and expire with it (PAYLOAD_TTL_SECONDS for Redis).
+Handles are validated before use; a handle never carries a storage location.
+"""
+
+from __future__ import annotations
+
+import re
+import uuid
+from collections.abc import Iterator
+from itertools import islice
+from typing import Any
+
+from tokyoradar_shared.payloads import PAYLOAD_TTL_SECONDS, iter_payload, open_payload_writer, payload_ref
+
+RESULT_TTL_SECONDS = PAYLOAD_TTL_SECONDS
+PREVIEW_ROWS = 10
+_HANDLE_RE = re.compile(r"^[a-z]+-[0-9a-f]{16}$")
+
+
+class ResultWriter:
+    """Collects one tool result's rows under a new handle, keeping a short preview."""
+
+    def __init__(self, kind: str, preview_rows: int = PREVIEW_ROWS) -> None:
+        self.handle = f"{kind}-{uuid.uuid4().hex[:16]}"
+        self.preview_rows = preview_rows
+        self.preview: list[dict] = []
+        self.count = 0
+        self._writer = open_payload_writer(_payload_name(self.handle))
+        self._closed = False
+
+    def write(self, row: dict) -> None:
+        self._writer.write(row)
+        self.count += 1
+        if len(self.preview) < self.preview_rows:
+            self.preview.append(row)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def iter_results(handle: str) -> Iterator[dict]:
+    """Stream every row of a result. Raises KeyError for invalid, unknown or expired handles."""
+    if not isinstance(handle, str) or not _HANDLE_RE.match(handle):
+        raise KeyError(f"Invalid result handle: {handle!r}")
+    try:
+        yield from iter_payload(payload_ref(_payload_name(handle)))
+    except KeyError:
+        raise KeyError(f"Result {handle} expired or not found") from None
+
+
+def select_results(
+    handle: str,
+    name_query: str | None = None,
+    in_stock_only: bool = False,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[dict]:
+    """Rows of a result matching the filters, in stored order.
+
+    name_query keeps rows whose name contains it (case-insensitive);
+    in_stock_only drops rows marked out of stock. offset/limit apply after
+    filtering.
+    """
+    query = name_query.lower() if name_query else None
+
+    def keep(row: dict) -> bool:
+        if query and query not in str(row.get("name", "")).lower():
+            return False
+        if in_stock_only and not is_in_stock(row.get("in_stock", True)):
+            return False
+        return True
+
+    rows = (row for row in iter_results(handle) if keep(row))
+    stop = None if limit is None else offset + limit
+    return list(islice(rows, offset, stop))
+
+
+def is_in_stock(value: Any) -> bool:
+    """Stock flag from a row; scrapers emit bools or "True"/"False" strings."""
+    if isinstance(value, str):
+        return value.strip().lower() not in ("false", "0", "no", "")
+    return bool(value)
+
+
+def _payload_name(handle: str) -> str:
+    return f"result-{handle}"